@@ -5,9 +5,11 @@ MemeMind: AI-Powered Meme Generator
 This is the main entry point for the MemeMind application.
 """
 
+import gc
 import os
+import signal
+import socket
 import sys
-import nltk
 from web.app import app
 
 def setup_resources():
@@ -24,12 +26,20 @@ def setup_resources():
     
     # Download NLTK resources
     print("Setting up NLTK resources...")
+    import nltk
+    
     try:
         nltk.data.find('tokenizers/punkt')
     except LookupError:
         print("Downloading NLTK punkt tokenizer...")
         nltk.download('punkt')
     
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+    except LookupError:
+        print("Downloading NLTK punkt tables...")
+        nltk.download('punkt_tab')
+    
     try:
         nltk.data.find('corpora/stopwords')
     except LookupError:
@@ -47,6 +57,106 @@ def setup_resources():
     print("Some NLP features may be limited.")
     
     print("Resource setup complete.")
+    print("For hosts without network access, pack these into an offline bundle with:")
+    print("    python -m nlp.resources build nlp_resources-v1.pickle")
+    print("and point MEMEMIND_NLP_BUNDLE at it.")
+
+def check_nlp_resources():
+    """
+    Check that the NLP resources can be loaded without downloading anything.
+    
+    Exits if a configured bundle is unusable, or if resources are missing
+    and downloads are disabled, instead of failing or blocking on the first
+    request. Otherwise missing resources only produce a warning.
+    """
+    from nlp.resources import check_resources
+    
+    bundle_path = app.config['NLP_RESOURCE_BUNDLE']
+    problems = check_resources(bundle_path)
+    if not problems:
+        return
+    
+    for problem in problems:
+        print(f"NLP resources: {problem}")
+    if bundle_path or not app.config['NLP_ALLOW_DOWNLOAD']:
+        sys.exit(1)
+    print("Missing NLP resources will be downloaded on first use (or run: python app.py --setup)")
+
+def serve_prefork(port, workers, host="0.0.0.0"):
+    """
+    Serve the application from pre-forked worker processes.
+    
+    The master loads the analyzer, lexicons, fonts and decoded templates once,
+    then forks the workers, which share those pages copy-on-write and accept
+    connections on one listening socket. Workers that exit are replaced.
+    
+    Args:
+        port (int): Port to listen on
+        workers (int): Number of worker processes
+        host (str): Interface to bind
+    """
+    from werkzeug.serving import make_server
+    from web.app import preload, after_fork
+    
+    # Bind before forking so every worker accepts on the same socket
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    listener = socket.create_server((host, port), family=family, backlog=2048)
+    listener.set_inheritable(True)
+    
+    print("Preloading models and templates...")
+    preload()
+    
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collections in the workers don't write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+    
+    def spawn():
+        pid = os.fork()
+        if pid:
+            return pid
+        
+        # Worker: serve until terminated
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            after_fork()
+            server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+            server.serve_forever()
+        finally:
+            os._exit(1)
+    
+    children = {spawn() for _ in range(workers)}
+    print(f"Started {workers} workers (pids {', '.join(str(pid) for pid in sorted(children))})")
+    
+    stopping = False
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    # Reap workers, replacing any that die while we're running
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited; starting a replacement")
+            children.add(spawn())
+    
+    listener.close()
 
 if __name__ == "__main__":
     # Check if we need to set up resources
@@ -54,6 +164,9 @@ if __name__ == "__main__":
     if setup_flag:
         setup_resources()
     
+    # Fail fast instead of blocking on downloads later
+    check_nlp_resources()
+    
     # Check if port is specified
     port = 5000  # Default port
     for arg in sys.argv:
@@ -66,4 +179,23 @@ if __name__ == "__main__":
     # Run the application
     print(f"Starting MemeMind on port {port}...")
     print(f"Open your browser and navigate to http://localhost:{port}/ to use the application.")
-    app.run(host="0.0.0.0", port=port, debug="--debug" in sys.argv) 
\ No newline at end of file
+    # Number of pre-forked worker processes (0 runs the single-process server)
+    workers = 0
+    for arg in sys.argv:
+        if arg.startswith("--workers="):
+            try:
+                workers = int(arg.split("=")[1])
+            except ValueError:
+                pass
+    
+    if workers > 0:
+        serve_prefork(port, workers)
+    elif "--asgi" in sys.argv:
+        # Async serving: analysis and rendering run on an executor (see web/asgi.py)
+        try:
+            import uvicorn
+        except ImportError:
+            sys.exit("--asgi requires uvicorn: pip install uvicorn")
+        uvicorn.run("web.asgi:application", host="0.0.0.0", port=port)
+    else:
+        app.run(host="0.0.0.0", port=port, debug="--debug" in sys.argv) 
\ No newline at end of file
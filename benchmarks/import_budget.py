@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Import Budget Check
+
+Checks that the MemeMind web app starts quickly: importing web.app in a fresh
+interpreter must stay under a time budget and must not load the heavy NLP
+modules or Pillow, which are initialized on first use or by web.app.warm_up().
+
+Exits with status 1 when the budget is exceeded, so it can gate CI.
+
+Usage:
+    python benchmarks/import_budget.py [--budget SECONDS] [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported until the analyzer or the meme generator
+# is first used
+LAZY_MODULES = ("nltk", "vaderSentiment", "PIL")
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import web.app
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def measure_import():
+    """
+    Import web.app in a fresh interpreter.
+
+    Returns:
+        dict: 'seconds' spent importing and the 'loaded' lazy modules
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the web app import time budget.")
+    parser.add_argument("--budget", type=float, default=1.0, help="Max median import time in seconds")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    args = parser.parse_args(argv)
+
+    runs = [measure_import() for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+    loaded = sorted({module for run in runs for module in run["loaded"]})
+
+    print(f"import web.app: median {median * 1000:.0f} ms over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+
+    failed = False
+    if median > args.budget:
+        print("FAIL: import time is over budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(loaded)}")
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""
+MemeMind Benchmarks
+
+Times the hot paths of the MemeMind pipeline on fixed corpora:
+
+- analyze:         NLPAnalyzer.analyze (no result cache)
+- emotions:        EmotionDetector.detect_emotions
+- select_template: MemeGenerator.select_template
+- create_meme:     MemeGenerator.create_meme
+- http_analyze / http_generate_meme: end to end through the Flask test client
+
+The corpora are the captions in meme_captions.csv and synthetic long texts
+built from them with a fixed seed, so runs are comparable across commits.
+Each stage reports throughput, p50/p95/p99 latency and peak traced memory.
+
+Results can be saved as JSON and compared with an earlier run; the script
+exits with status 1 if any stage got slower than the regression threshold.
+
+Usage:
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --baseline results.json --threshold 0.10
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Latency percentiles reported for each stage
+PERCENTILES = (50, 95, 99)
+
+# Words per synthetic long text
+LONG_TEXT_WORDS = 2000
+
+def load_captions(path=os.path.join(ROOT, "meme_captions.csv")):
+    """
+    Load the caption corpus.
+
+    Returns:
+        list: Caption texts, in file order
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row["Caption"] for row in csv.DictReader(f) if row.get("Caption")]
+
+def build_long_texts(captions, count, seed=0):
+    """
+    Build long texts by concatenating randomly chosen captions.
+
+    Args:
+        captions (list): Source captions
+        count (int): Number of texts
+        seed (int): Seed for the caption choice
+
+    Returns:
+        list: Synthetic texts of about LONG_TEXT_WORDS words each
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = []
+        words = 0
+        while words < LONG_TEXT_WORDS:
+            caption = rng.choice(captions)
+            parts.append(caption)
+            words += len(caption.split())
+        texts.append(" ".join(parts))
+    return texts
+
+def percentile(sorted_values, pct):
+    """Get a percentile of sorted values, by linear interpolation."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+def run_stage(func, items, memory_items=20):
+    """
+    Time func over every item, then measure peak memory on a few of them.
+
+    Memory is traced in a separate pass, since tracemalloc slows everything
+    down and would distort the timings.
+
+    Args:
+        func (callable): Called once per item
+        items (list): Inputs
+        memory_items (int): Number of items run under tracemalloc
+
+    Returns:
+        dict: count, total_s, throughput_per_s, mean_ms, pXX_ms and peak_memory_kb
+    """
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - item_start)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in items[:memory_items]:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {
+        "count": len(items),
+        "total_s": round(total, 4),
+        "throughput_per_s": round(len(items) / total, 2) if total else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3)
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 3)
+    result["peak_memory_kb"] = round(peak / 1024, 1)
+    return result
+
+def git_commit():
+    """Get the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def peak_rss_kb():
+    """Get the peak resident set size of this process in KiB, if available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def run_benchmarks(args, workdir):
+    """
+    Run every stage.
+
+    Args:
+        args (argparse.Namespace): Command-line options
+        workdir (str): Scratch directory for templates and rendered memes
+
+    Returns:
+        dict: Stage name -> results from run_stage
+    """
+    from nlp.analyzer import NLPAnalyzer
+    from meme.generator import MemeGenerator
+
+    captions = load_captions()[:args.captions]
+    long_texts = build_long_texts(captions, args.long_texts)
+
+    # Templates are copied so placeholders and renders never touch the repo
+    templates_dir = os.path.join(workdir, "templates")
+    output_dir = os.path.join(workdir, "output")
+    shutil.copytree(os.path.join(ROOT, "meme", "templates"), templates_dir)
+    os.makedirs(output_dir)
+
+    analyzer = NLPAnalyzer()
+    generator = MemeGenerator(templates_dir=templates_dir)
+    params_list = [analyzer.get_meme_parameters(analyzer.analyze(text)) for text in captions]
+
+    # Warm lazily loaded models, fonts and templates before timing anything
+    analyzer.warm_up()
+    generator.warm_template_cache()
+
+    results = {}
+    random.seed(0)
+
+    results["analyze[captions]"] = run_stage(analyzer.analyze, captions)
+    results["analyze[long]"] = run_stage(analyzer.analyze, long_texts, memory_items=3)
+
+    detector = analyzer.emotion_detector
+    results["emotions[captions]"] = run_stage(detector.detect_emotions, captions)
+    results["emotions[long]"] = run_stage(detector.detect_emotions, long_texts, memory_items=3)
+
+    results["select_template"] = run_stage(generator.select_template, params_list)
+
+    render_params = params_list[:args.renders]
+    paths = iter(os.path.join(output_dir, f"render_{i}.jpg") for i in range(len(render_params) * 2))
+    results["create_meme"] = run_stage(lambda params: generator.create_meme(params, next(paths)), render_params, memory_items=5)
+
+    # End to end through the Flask app, with scratch directories
+    web_app = importlib.import_module("web.app")
+    web_app.app.config.update(
+        TEMPLATES_DIR=templates_dir,
+        UPLOAD_FOLDER=output_dir,
+        TEMPLATE_WATCH_INTERVAL=0
+    )
+    web_app.warm_up()
+    client = web_app.app.test_client()
+
+    def post(path, text):
+        response = client.post(path, json={"text": text})
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+
+    # Start from an empty result cache so only repeats within the corpus hit it
+    if web_app.analysis_cache is not None:
+        web_app.analysis_cache.clear()
+    results["http_analyze"] = run_stage(lambda text: post("/api/analyze", text), captions)
+
+    if web_app.analysis_cache is not None:
+        web_app.analysis_cache.clear()
+    results["http_generate_meme"] = run_stage(
+        lambda text: post("/api/generate-meme", text), captions[:args.renders], memory_items=5
+    )
+
+    return results
+
+def compare(results, baseline, threshold, metric):
+    """
+    Compare stage latencies with a baseline run.
+
+    Args:
+        results (dict): Current stage results
+        baseline (dict): Stage results of the baseline run
+        threshold (float): Allowed relative slowdown, e.g. 0.1 for 10%
+        metric (str): Latency field compared, e.g. "p50_ms"
+
+    Returns:
+        list: (stage, baseline value, current value, change) for regressions
+    """
+    regressions = []
+    for stage, current in results.items():
+        previous = baseline.get(stage)
+        if not previous or not previous.get(metric):
+            continue
+        change = current[metric] / previous[metric] - 1
+        print(f"  {stage:<22} {previous[metric]:>10.3f} -> {current[metric]:>10.3f} ms  {change:+7.1%}")
+        if change > threshold:
+            regressions.append((stage, previous[metric], current[metric], change))
+    return regressions
+
+def print_results(results):
+    """Print a table of stage results."""
+    header = f"{'stage':<22} {'n':>5} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak KiB':>10}"
+    print(header)
+    print("-" * len(header))
+    for stage, result in results.items():
+        print(
+            f"{stage:<22} {result['count']:>5} {result['throughput_per_s']:>10} "
+            f"{result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f} "
+            f"{result['peak_memory_kb']:>10}"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MemeMind pipeline.")
+    parser.add_argument("--captions", type=int, default=None, help="Use only the first N captions")
+    parser.add_argument("--long-texts", type=int, default=20, help="Number of synthetic long texts")
+    parser.add_argument("--renders", type=int, default=100, help="Number of memes rendered per render stage")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with the JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown before failing")
+    parser.add_argument("--metric", default="p50_ms", choices=[f"p{pct}_ms" for pct in PERCENTILES] + ["mean_ms"],
+                        help="Latency compared against the baseline")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="mememind-bench-") as workdir:
+        results = run_benchmarks(args, workdir)
+
+    print_results(results)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "peak_rss_kb": peak_rss_kb(),
+        "stages": results
+    }
+    print(f"\nPeak RSS: {report['peak_rss_kb']} KiB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.baseline} ({baseline.get('commit') or 'unknown commit'}), {args.metric}:")
+        regressions = compare(results, baseline.get("stages", {}), args.threshold, args.metric)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the {args.threshold:.0%} threshold:")
+            for stage, _, _, change in regressions:
+                print(f"  {stage}: {change:+.1%}")
+            return 1
+        print(f"\nNo stage regressed by more than {args.threshold:.0%}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,21 @@ Meme generation package for MemeMind meme generator.
 This package provides functionality for creating memes based on NLP analysis results.
 """
 
-from .generator import MemeGenerator
+import importlib
 
-__all__ = ['MemeGenerator'] 
\ No newline at end of file
+# Public name -> defining module, imported on first access
+_EXPORTS = {
+    'MemeGenerator': '.generator',
+    'TemplateIndex': '.index',
+    'CaptionIndex': '.captions',
+    'TemplateScorer': '.scoring'
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = ['MemeGenerator', 'TemplateIndex', 'CaptionIndex', 'TemplateScorer'] 
\ No newline at end of file
@@ -0,0 +1,374 @@
+"""
+Meme Cache Module
+
+This module keeps decoded meme template images and parsed fonts in memory, and
+rendered memes on disk, so the MemeMind generator does not repeat work per render.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Font sizes are rounded down to a multiple of this step so that templates of
+# similar widths share cached font objects
+FONT_SIZE_STEP = 4
+
+# Process-wide font cache: (font_path, bucketed_size) -> font
+_fonts = {}
+_fonts_lock = threading.Lock()
+
+def bucket_font_size(size):
+    """
+    Round a font size down to its cache bucket.
+
+    Args:
+        size (int): Requested font size in pixels
+
+    Returns:
+        int: Bucketed font size, at least FONT_SIZE_STEP
+    """
+    return max(FONT_SIZE_STEP, int(size) // FONT_SIZE_STEP * FONT_SIZE_STEP)
+
+def get_font(font_path, size):
+    """
+    Get a font, parsing the font file only once per (path, size) bucket.
+
+    Falls back to Pillow's default font if the font file cannot be loaded;
+    the fallback is cached too, so a missing font is not retried per render.
+
+    Args:
+        font_path (str): Path to a TrueType font
+        size (int): Requested font size in pixels
+
+    Returns:
+        PIL.ImageFont.FreeTypeFont: The cached font
+    """
+    key = (font_path, bucket_font_size(size))
+    font = _fonts.get(key)
+    if font is None:
+        # Pillow is imported on first use, so importing the cache stays cheap
+        from PIL import ImageFont
+        try:
+            font = ImageFont.truetype(font_path, key[1])
+        except OSError:
+            font = ImageFont.load_default()
+        with _fonts_lock:
+            font = _fonts.setdefault(key, font)
+    return font
+
+def warm_fonts(font_path, sizes):
+    """
+    Preload a font at the given sizes.
+
+    Args:
+        font_path (str): Path to a TrueType font
+        sizes (iterable): Font sizes in pixels
+    """
+    for size in sizes:
+        get_font(font_path, size)
+
+def clear_font_cache():
+    """Drop all cached fonts, e.g. after installing a new font file."""
+    with _fonts_lock:
+        _fonts.clear()
+
+class TemplateCache:
+    """
+    Byte-budgeted LRU cache of decoded template bitmaps.
+
+    Templates are decoded once and stored as RGB images. Each request gets
+    its own copy to draw on, so cached bitmaps are never modified. A file's
+    modification time is compared on every lookup so edited templates reload.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        """
+        Initialize the template cache.
+
+        Args:
+            max_bytes (int): Memory budget for decoded pixels
+        """
+        self.max_bytes = max_bytes
+
+        # path -> (image, mtime, size), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_path, mtime=None):
+        """
+        Get a copy of a decoded template ready for drawing.
+
+        Args:
+            template_path (str): Path to the template image
+            mtime (float, optional): Known modification time of the file; when
+                given, the file is not stat'ed
+
+        Returns:
+            PIL.Image.Image: A private RGB copy of the template
+
+        Raises:
+            OSError: If the template cannot be found or decoded
+        """
+        if mtime is None:
+            mtime = os.stat(template_path).st_mtime
+
+        with self._lock:
+            entry = self._entries.get(template_path)
+            if entry is not None and entry[1] == mtime:
+                self._entries.move_to_end(template_path)
+                self.hits += 1
+                return entry[0].copy()
+            self.misses += 1
+
+        # Decode outside the lock so other templates can still be served
+        image = self._decode(template_path)
+        self._store(template_path, image, mtime)
+        return image.copy()
+
+    def warm(self, template_path, mtime=None):
+        """
+        Decode a template into the cache without making a copy for drawing.
+        
+        Args:
+            template_path (str): Path to the template image
+            mtime (float, optional): Known modification time of the file
+            
+        Raises:
+            OSError: If the template cannot be found or decoded
+        """
+        if mtime is None:
+            mtime = os.stat(template_path).st_mtime
+        
+        with self._lock:
+            entry = self._entries.get(template_path)
+            if entry is not None and entry[1] == mtime:
+                return
+        
+        self._store(template_path, self._decode(template_path), mtime)
+    
+    def _decode(self, template_path):
+        """Decode a template from disk into an RGB bitmap."""
+        from PIL import Image
+        with Image.open(template_path) as source:
+            return source.convert("RGB")
+
+    def _store(self, template_path, image, mtime):
+        """Add a decoded template, evicting least recently used ones if over budget."""
+        size = image.width * image.height * len(image.getbands())
+
+        # Templates larger than the whole budget are never cached
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(template_path, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+            self._entries[template_path] = (image, mtime, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate(self, template_path=None):
+        """
+        Drop one cached template, or all of them.
+
+        Args:
+            template_path (str, optional): Template to drop; all templates if omitted
+        """
+        with self._lock:
+            if template_path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                entry = self._entries.pop(template_path, None)
+                if entry is not None:
+                    self._bytes -= entry[2]
+
+    def stats(self):
+        """
+        Get cache usage statistics.
+
+        Returns:
+            dict: Entry count, bytes used, hits and misses
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+class RenderCache:
+    """
+    Content-addressed store of rendered memes on disk.
+
+    Each rendered meme is saved under a name derived from a hash of its
+    inputs, so an identical request is served from the existing file instead
+    of being rendered again. The directory is kept under a byte budget by
+    evicting the least recently used files. Only files named by this cache
+    are ever evicted.
+    """
+
+    PREFIX = "meme_"
+    EXTENSIONS = (".jpg", ".webp", ".png")
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        """
+        Initialize the render cache and index the files already on disk.
+
+        Args:
+            directory (str): Directory where rendered memes are stored
+            max_bytes (int): Disk budget for cached memes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        # file name -> size in bytes, least recently used first
+        self._files = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _is_cache_file(self, name):
+        """Check whether a file name was produced by this cache."""
+        stem, extension = os.path.splitext(name)
+        if not (stem.startswith(self.PREFIX) and extension in self.EXTENSIONS):
+            return False
+        digest = stem[len(self.PREFIX):]
+        return len(digest) == 32 and all(c in "0123456789abcdef" for c in digest)
+
+    def _scan(self):
+        """Load existing cache files, oldest first, so restarts keep the LRU order."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if self._is_cache_file(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._bytes += size
+
+    def filename(self, key, extension=".jpg"):
+        """
+        Get the file name for a cache key.
+
+        Args:
+            key (str): Hex digest of the render inputs
+            extension (str): File extension of the encoded image
+
+        Returns:
+            str: The content-addressed file name
+        """
+        return f"{self.PREFIX}{key[:32]}{extension}"
+
+    def lookup(self, key, extension=".jpg"):
+        """
+        Find a previously rendered meme.
+
+        Args:
+            key (str): Hex digest of the render inputs
+            extension (str): File extension of the encoded image
+
+        Returns:
+            str: Path to the cached meme, or None on a miss
+        """
+        name = self.filename(key, extension)
+        path = os.path.join(self.directory, name)
+
+        with self._lock:
+            if name not in self._files:
+                self.misses += 1
+                return None
+            self._files.move_to_end(name)
+            self.hits += 1
+
+        # Refresh the mtime so the LRU order survives restarts
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Removed behind our back; treat as a miss
+            with self._lock:
+                size = self._files.pop(name, None)
+                if size is not None:
+                    self._bytes -= size
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+        return path
+
+    def store(self, key, data, extension=".jpg"):
+        """
+        Save an encoded meme and evict old ones if over budget.
+
+        Args:
+            key (str): Hex digest of the render inputs
+            data (bytes): The encoded meme image
+            extension (str): File extension of the encoded image
+
+        Returns:
+            str: Path to the stored meme
+        """
+        name = self.filename(key, extension)
+        path = os.path.join(self.directory, name)
+
+        # Write to a temporary file first so readers never see partial images
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        evicted = []
+        with self._lock:
+            old_size = self._files.pop(name, None)
+            if old_size is not None:
+                self._bytes -= old_size
+            self._files[name] = len(data)
+            self._bytes += len(data)
+
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                evicted_name, evicted_size = self._files.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+                evicted.append(evicted_name)
+
+        for evicted_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, evicted_name))
+            except FileNotFoundError:
+                pass
+
+        return path
+
+    def stats(self):
+        """
+        Get cache usage statistics.
+
+        Returns:
+            dict: File count, bytes on disk, hits, misses and evictions
+        """
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,410 @@
+"""
+Caption Index Module
+
+This module retrieves curated captions (meme_captions.csv) that match an
+analyzed text, for use as caption suggestions by the MemeMind generator.
+
+Captions are indexed as TF-IDF vectors stored term by term: for every term,
+the ids of the captions containing it and their normalized weights. A query
+only reads the posting lists of its own terms, so lookups stay fast however
+many captions are indexed. Stopwords are dropped from captions and queries,
+generated filler rows ("Funny trending caption 12 for ...") are not indexed,
+and topic and emotion labels are expanded into related words, since the
+labels themselves rarely appear in captions. The expansions are data
+(caption_keywords.json by default), stored with a saved index, so a corpus
+can ship its own. An index built from a CSV can be saved as a
+directory of .npy arrays and opened memory-mapped, so large corpora are paged
+in on demand and shared between processes instead of being loaded per worker.
+
+Usage:
+    python -m meme.captions build meme_captions.csv meme/caption_index [--keywords keywords.json]
+    python -m meme.captions search meme/caption_index "monday again, no coffee"
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import numpy as np
+
+INDEX_VERSION = 2
+
+# Words of a caption or query: letters and digits, with an optional
+# apostrophe suffix ("don't", "cat's")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Filler rows of meme_captions.csv, e.g. "Funny trending caption 12 for Drakeposting"
+_PLACEHOLDER_CAPTION = re.compile(r"^Funny trending caption \d+ for ", re.IGNORECASE)
+
+# Words too common to say anything about a caption. Kept here rather than
+# taken from NLTK, so the meme package does not depend on NLP resources
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because
+been before being below between both but by can could did do does doing down
+during each few for from further get got had has have having he her here hers
+herself him himself his how i if in into is it its itself just let me more most
+my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your
+yours yourself yourselves i'm i've i'll i'd it's it'll that's there's don't
+doesn't didn't can't won't isn't aren't wasn't weren't let's you're they're
+we're he's she's
+""".split())
+
+# Topic and emotion label -> generic related words, used to expand the labels
+# passed as keywords to CaptionIndex.search. A saved index keeps its own copy
+KEYWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "caption_keywords.json")
+
+# Weight of a keyword's terms relative to the words of the text itself, which
+# describe what the user wants more specifically
+KEYWORD_WEIGHT = 0.5
+
+# Query terms found in more than this fraction of captions are ignored; they
+# carry almost no weight but have the longest posting lists
+MAX_QUERY_DF = 0.25
+
+# Captions whose cosine similarity to the query is below this are not returned
+MIN_SCORE = 0.1
+
+# Arrays of a saved index, by file name
+_ARRAYS = ("idf", "postings_ptr", "postings_doc", "postings_weight", "caption_meme", "text_ptr", "text")
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms, without stopwords.
+
+    Args:
+        text (str): Caption or query text
+
+    Returns:
+        list: Terms, in order
+    """
+    return [term for term in _TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+def load_keyword_terms(path=KEYWORDS_PATH):
+    """
+    Load keyword expansions from a JSON file of label -> list of words.
+
+    Args:
+        path (str): JSON file, by default the generic caption_keywords.json
+
+    Returns:
+        dict: Lowercase label -> tuple of index terms
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        expansions = json.load(f)
+    return {
+        label.lower(): tuple(dict.fromkeys(term for word in words for term in tokenize(word)))
+        for label, words in expansions.items()
+    }
+
+class CaptionIndex:
+    """
+    TF-IDF index over captions, searchable by free text and keywords.
+
+    Instances are read-only once built, so one index can be shared by every
+    thread (and, when memory-mapped, every process).
+    """
+
+    def __init__(self, terms, meme_names, arrays, keyword_terms=None):
+        """
+        Wrap built or loaded index arrays; use from_captions(), from_csv() or open().
+
+        Args:
+            terms (list): Term of each term id
+            meme_names (list): Meme name of each meme id
+            arrays (dict): The arrays listed in _ARRAYS
+            keyword_terms (dict, optional): Keyword expansions as returned by
+                load_keyword_terms; defaults to caption_keywords.json
+        """
+        self.keyword_terms = keyword_terms if keyword_terms is not None else load_keyword_terms()
+        self.terms = {term: term_id for term_id, term in enumerate(terms)}
+        self.meme_names = list(meme_names)
+        self._meme_ids = {name: meme_id for meme_id, name in enumerate(self.meme_names)}
+        self._term_list = list(terms)
+
+        self.idf = arrays["idf"]  # Per term
+        self.postings_ptr = arrays["postings_ptr"]  # Per term: start of its postings, plus the end
+        self.postings_doc = arrays["postings_doc"]  # Per posting: caption id
+        self.postings_weight = arrays["postings_weight"]  # Per posting: normalized TF-IDF weight
+        self.caption_meme = arrays["caption_meme"]  # Per caption: meme id
+        self.text_ptr = arrays["text_ptr"]  # Per caption: start of its UTF-8 text, plus the end
+        self.text = arrays["text"]  # All caption texts, concatenated
+
+    def __len__(self):
+        """Return the number of indexed captions."""
+        return len(self.caption_meme)
+
+    @classmethod
+    def from_captions(cls, rows, keyword_terms=None):
+        """
+        Build an index in memory.
+
+        Filler captions matching "Funny trending caption N for ..." are skipped.
+
+        Args:
+            rows (iterable): (meme name, caption) pairs
+            keyword_terms (dict, optional): Keyword expansions; see __init__
+
+        Returns:
+            CaptionIndex: The built index
+        """
+        terms = {}
+        meme_ids = {}
+        caption_meme = []
+        texts = []
+        doc_terms = []
+
+        # Count term frequencies per caption
+        for meme_name, caption in rows:
+            if _PLACEHOLDER_CAPTION.match(caption):
+                continue
+            counts = {}
+            for term in tokenize(caption):
+                term_id = terms.setdefault(term, len(terms))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            caption_meme.append(meme_ids.setdefault(meme_name, len(meme_ids)))
+            texts.append(caption.encode("utf-8"))
+            doc_terms.append(counts)
+
+        num_captions = len(texts)
+        lengths = np.fromiter((len(counts) for counts in doc_terms), dtype=np.int64, count=num_captions)
+        docs = np.repeat(np.arange(num_captions, dtype=np.int32), lengths)
+        term_ids = np.fromiter((term_id for counts in doc_terms for term_id in counts), dtype=np.int32, count=len(docs))
+        frequencies = np.fromiter((tf for counts in doc_terms for tf in counts.values()), dtype=np.float32, count=len(docs))
+
+        # Smoothed IDF and sublinear TF, L2-normalized per caption
+        df = np.bincount(term_ids, minlength=len(terms))
+        idf = (np.log((1 + num_captions) / (1 + df)) + 1).astype(np.float32)
+        weights = (1 + np.log(frequencies)) * idf[term_ids]
+        norms = np.sqrt(np.bincount(docs, weights=weights * weights, minlength=num_captions))
+        weights = (weights / norms[docs]).astype(np.float32)
+
+        # Group the (caption, weight) pairs by term
+        order = np.argsort(term_ids, kind="stable")
+        postings_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(df, out=postings_ptr[1:])
+
+        text_ptr = np.zeros(num_captions + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=text_ptr[1:])
+
+        arrays = {
+            "idf": idf,
+            "postings_ptr": postings_ptr,
+            "postings_doc": docs[order],
+            "postings_weight": weights[order],
+            "caption_meme": np.array(caption_meme, dtype=np.int32),
+            "text_ptr": text_ptr,
+            "text": np.frombuffer(b"".join(texts), dtype=np.uint8)
+        }
+        return cls(list(terms), list(meme_ids), arrays, keyword_terms)
+
+    @classmethod
+    def from_csv(cls, path, keyword_terms=None):
+        """
+        Build an index from a CSV file with "Meme Name" and "Caption" columns.
+
+        Args:
+            path (str): Path to the CSV file
+            keyword_terms (dict, optional): Keyword expansions; see __init__
+
+        Returns:
+            CaptionIndex: The built index
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = ((row["Meme Name"], row["Caption"]) for row in csv.DictReader(f) if row.get("Caption"))
+            return cls.from_captions(rows, keyword_terms)
+
+    def save(self, directory):
+        """
+        Write the index as a directory of .npy arrays for open().
+
+        Args:
+            directory (str): Output directory, created if missing
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(getattr(self, name)))
+
+        with open(os.path.join(directory, "terms.txt"), 'w', encoding='utf-8') as f:
+            f.writelines(f"{term}\n" for term in self._term_list)
+
+        with open(os.path.join(directory, "keywords.json"), 'w', encoding='utf-8') as f:
+            json.dump({label: list(terms) for label, terms in self.keyword_terms.items()}, f, indent=2)
+
+        # Written last, so a directory with metadata is complete
+        with open(os.path.join(directory, "index.json"), 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "captions": len(self), "meme_names": self.meme_names}, f)
+
+    @classmethod
+    def open(cls, directory, mmap=True):
+        """
+        Open an index saved with save().
+
+        Args:
+            directory (str): Index directory
+            mmap (bool): Memory-map the arrays instead of reading them
+
+        Returns:
+            CaptionIndex: The opened index
+
+        Raises:
+            ValueError: If the directory holds an index of another version
+        """
+        with open(os.path.join(directory, "index.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Caption index {directory} has version {meta.get('version')}, expected {INDEX_VERSION}")
+
+        with open(os.path.join(directory, "terms.txt"), 'r', encoding='utf-8') as f:
+            terms = f.read().splitlines()
+
+        # Indexes saved without expansions use the generic ones
+        keywords_path = os.path.join(directory, "keywords.json")
+        keyword_terms = load_keyword_terms(keywords_path) if os.path.exists(keywords_path) else None
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in _ARRAYS}
+        return cls(terms, meta["meme_names"], arrays, keyword_terms)
+
+    def expand_keyword(self, keyword):
+        """
+        Expand a topic or emotion label into query terms.
+
+        Args:
+            keyword (str): Label such as "sadness" or "social_media", or any word
+
+        Returns:
+            list: The label's related terms, or the keyword's own terms if it has none
+        """
+        terms = self.keyword_terms.get(keyword.lower())
+        return list(terms) if terms else tokenize(keyword.replace("_", " "))
+
+    def caption(self, caption_id):
+        """Get the text of a caption by id."""
+        start, end = self.text_ptr[caption_id], self.text_ptr[caption_id + 1]
+        return self.text[start:end].tobytes().decode("utf-8")
+
+    def search(self, text="", keywords=(), k=5, meme=None, min_score=MIN_SCORE):
+        """
+        Find the captions most similar to a text and keywords.
+
+        Args:
+            text (str): Free text, e.g. the user's input
+            keywords (iterable): Topic and emotion labels, expanded with
+                expand_keyword() and weighted by KEYWORD_WEIGHT
+            k (int): Maximum number of results
+            meme (str, optional): Only return captions of this meme name
+            min_score (float): Smallest cosine similarity returned
+
+        Returns:
+            list: Dicts with 'caption', 'meme' and 'score', best match first
+        """
+        # Query term weights: weighted term frequency
+        query = {}
+        weighted_terms = [(term, 1.0) for term in tokenize(text)]
+        weighted_terms += [(term, KEYWORD_WEIGHT) for keyword in keywords for term in self.expand_keyword(keyword)]
+        for term, weight in weighted_terms:
+            term_id = self.terms.get(term)
+            if term_id is not None:
+                query[term_id] = query.get(term_id, 0) + weight
+
+        max_postings = max(1, int(len(self) * MAX_QUERY_DF))
+        docs = []
+        scores = []
+        norm = 0.0
+        for term_id, weight in query.items():
+            start, end = self.postings_ptr[term_id], self.postings_ptr[term_id + 1]
+            if end - start > max_postings:
+                continue
+            # TF-IDF of the query term, so scores are cosine similarities
+            weight *= float(self.idf[term_id])
+            norm += weight * weight
+            docs.append(self.postings_doc[start:end])
+            scores.append(self.postings_weight[start:end] * weight)
+
+        if not docs or k <= 0:
+            return []
+        docs = np.concatenate(docs)
+        scores = np.concatenate(scores)
+
+        if meme is not None:
+            meme_id = self._meme_ids.get(meme)
+            if meme_id is None:
+                return []
+            keep = self.caption_meme[docs] == meme_id
+            docs = docs[keep]
+            scores = scores[keep]
+            if not len(docs):
+                return []
+
+        # Sum the contributions of every query term per caption, dropping weak matches
+        caption_ids, positions = np.unique(docs, return_inverse=True)
+        totals = np.bincount(positions, weights=scores) / np.sqrt(norm)
+        strong = totals >= min_score
+        caption_ids = caption_ids[strong]
+        totals = totals[strong]
+        if not len(totals):
+            return []
+
+        # Best k, ties broken by caption order
+        if len(totals) > k:
+            top = np.argpartition(-totals, k - 1)[:k]
+        else:
+            top = np.arange(len(totals))
+        top = top[np.lexsort((caption_ids[top], -totals[top]))]
+
+        return [
+            {
+                "caption": self.caption(int(caption_ids[i])),
+                "meme": self.meme_names[int(self.caption_meme[caption_ids[i]])],
+                "score": round(float(totals[i]), 4)
+            }
+            for i in top
+        ]
+
+def load_caption_index(path, mmap=True):
+    """
+    Load a caption index from a saved index directory or a captions CSV.
+
+    Args:
+        path (str): Directory written by CaptionIndex.save, or a CSV file
+        mmap (bool): Memory-map a saved index
+
+    Returns:
+        CaptionIndex: The loaded index
+    """
+    if os.path.isdir(path):
+        return CaptionIndex.open(path, mmap=mmap)
+    return CaptionIndex.from_csv(path)
+
+def main(argv=None):
+    """Command-line entry point to build or query a caption index."""
+    parser = argparse.ArgumentParser(description="Build or search the caption retrieval index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Index a captions CSV into a directory")
+    build.add_argument("csv", help="CSV file with 'Meme Name' and 'Caption' columns")
+    build.add_argument("output", help="Index directory to write")
+    build.add_argument("--keywords", default=KEYWORDS_PATH,
+                       help="JSON file of topic/emotion label -> related words")
+    search = subparsers.add_parser("search", help="Print the best captions for a text")
+    search.add_argument("index", help="Index directory or captions CSV")
+    search.add_argument("text", help="Text to find captions for")
+    search.add_argument("-k", type=int, default=5, help="Number of captions")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = CaptionIndex.from_csv(args.csv, load_keyword_terms(args.keywords))
+        index.save(args.output)
+        print(f"Indexed {len(index)} captions ({len(index.terms)} terms) into {args.output}")
+        return 0
+
+    for match in load_caption_index(args.index).search(args.text, k=args.k):
+        print(f"{match['score']:.3f}  [{match['meme']}] {match['caption']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,32 +4,267 @@ Meme Generator Module
 This module is responsible for generating memes based on NLP analysis results.
 """
 
+import hashlib
+import io
+import math
 import os
 import random
-from PIL import Image, ImageDraw, ImageFont
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
-import pkg_resources
+from .cache import FONT_SIZE_STEP, TemplateCache, bucket_font_size, get_font, warm_fonts
+from .index import TemplateIndex, DEFAULT_TEMPLATES, caption_regions
+from metrics import stage
+
+# Default encoding settings; quality 75 and 4:2:0 subsampling match Pillow's JPEG defaults
+ENCODE_DEFAULTS = {
+    "format": "JPEG",
+    "quality": 75,
+    "optimize": False,
+    "progressive": False,
+    "subsampling": None
+}
+
+# Version of the caption drawing and layout, part of every render cache key.
+# Bump it whenever a change to drawing, wrapping, font fitting or caption
+# placement alters rendered pixels, so cached renders from an older version
+# (which survive restarts on disk) are not served
+RENDER_VERSION = 1
+
+# Supported output formats
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+FORMAT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+def _stroke_width(font_size):
+    """Get the caption outline width for a font size."""
+    return max(1, font_size // 20)
+
+class CaptionLayoutEngine:
+    """
+    Wraps captions and finds the largest font size that fits a box.
+    
+    Glyph advance widths are measured once per character at a reference size
+    and scaled linearly to other sizes, so fitting a caption never measures
+    whole strings. Kerning is ignored, which is a small error for caption fonts.
+    """
+    
+    REFERENCE_SIZE = 100
+    LINE_SPACING = 4  # Same spacing as Pillow's multiline text
+    
+    def __init__(self, font_path, min_size=12):
+        """
+        Initialize the layout engine for a font.
+        
+        Args:
+            font_path (str): Path to a TrueType font
+            min_size (int): Smallest font size fitting may shrink to
+        """
+        self.font_path = font_path
+        self.min_size = bucket_font_size(min_size)
+        
+        # Character -> advance width at REFERENCE_SIZE
+        self._advances = {}
+        
+        # Pillow is imported on first use, so importing the generator stays cheap
+        from PIL import ImageFont
+        
+        try:
+            self._reference_font = ImageFont.truetype(font_path, self.REFERENCE_SIZE)
+        except OSError:
+            self._reference_font = None
+            return
+        
+        ascent, descent = self._reference_font.getmetrics()
+        self._line_ratio = (ascent + descent) / self.REFERENCE_SIZE
+    
+    @property
+    def scalable(self):
+        """bool: Whether the font loaded, so sizes can be fitted."""
+        return self._reference_font is not None
+    
+    def _reference_width(self, text):
+        """Get the width of a text at REFERENCE_SIZE from cached glyph advances."""
+        advances = self._advances
+        width = 0.0
+        for char in text:
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = self._reference_font.getlength(char)
+            width += advance
+        return width
+    
+    def line_height(self, font_size):
+        """
+        Get the vertical distance between caption lines.
+        
+        Args:
+            font_size (int): Font size in pixels
+            
+        Returns:
+            int: Line height in pixels
+        """
+        return math.ceil(self._line_ratio * font_size) + 2 * _stroke_width(font_size) + self.LINE_SPACING
+    
+    def _wrap(self, words, word_widths, space_width, scale, padding, max_width):
+        """Greedily wrap words into (line, width) tuples at the given scale."""
+        lines = []
+        start = 0
+        line_width = 0.0
+        for index, word_width in enumerate(word_widths):
+            if index == start:
+                line_width = word_width
+            elif (line_width + space_width + word_width) * scale + padding > max_width:
+                lines.append((" ".join(words[start:index]), line_width * scale + padding))
+                start = index
+                line_width = word_width
+            else:
+                line_width += space_width + word_width
+        if start < len(words):
+            lines.append((" ".join(words[start:]), line_width * scale + padding))
+        return lines
+    
+    def fit(self, text, max_width, max_height, max_size):
+        """
+        Wrap a caption at the largest font size that fits the box.
+        
+        Args:
+            text (str): The caption text
+            max_width (int): Box width in pixels
+            max_height (int): Box height in pixels
+            max_size (int): Largest font size to consider
+            
+        Returns:
+            tuple: (font_size, lines, line_height) where lines are (line, line_width)
+                tuples; uses min_size if the caption does not fit at any size
+        """
+        words = text.split()
+        word_widths = [self._reference_width(word) for word in words]
+        space_width = self._reference_width(" ")
+        
+        def layout(font_size):
+            scale = font_size / self.REFERENCE_SIZE
+            padding = 2 * _stroke_width(font_size)
+            return self._wrap(words, word_widths, space_width, scale, padding, max_width)
+        
+        def fits(font_size, lines):
+            if len(lines) * self.line_height(font_size) > max_height:
+                return False
+            return all(line_width <= max_width for _, line_width in lines)
+        
+        # Binary search over the cached font size buckets
+        low = self.min_size // FONT_SIZE_STEP
+        high = max(low, bucket_font_size(max_size) // FONT_SIZE_STEP)
+        best = None
+        while low <= high:
+            middle = (low + high) // 2
+            font_size = middle * FONT_SIZE_STEP
+            lines = layout(font_size)
+            if fits(font_size, lines):
+                best = (font_size, lines)
+                low = middle + 1
+            else:
+                high = middle - 1
+        
+        if best is None:
+            best = (self.min_size, layout(self.min_size))
+        
+        font_size, lines = best
+        return font_size, lines, self.line_height(font_size)
 
 class MemeGenerator:
     """Generates memes based on NLP analysis of input text."""
     
-    def __init__(self, templates_dir="meme/templates"):
+    def __init__(self, templates_dir="meme/templates", template_cache_bytes=256 * 1024 * 1024,
+                 deterministic=False, seed=0, render_cache=None, render_workers=None,
+                 encode_options=None, captions_path=None, greedy_templates=False):
         """
         Initialize the meme generator.
         
         Args:
             templates_dir (str): Directory containing meme templates
+            template_cache_bytes (int): Memory budget for decoded template images
+            deterministic (bool): Pick templates with a choice seeded by the input
+                text, so identical requests produce identical memes
+            seed (int): Seed mixed into deterministic template choices
+            render_cache (RenderCache, optional): Content-addressed store that
+                serves repeated renders without drawing them again
+            render_workers (int, optional): Threads used by create_memes; Pillow
+                releases the GIL while decoding, resizing and encoding
+            encode_options (dict, optional): Output encoding defaults: format
+                (JPEG, WEBP or PNG), quality, optimize, progressive and
+                subsampling (JPEG only); see ENCODE_DEFAULTS
+            captions_path (str, optional): Captions CSV or saved caption index
+                directory used by suggest_captions; loaded on first use
+            greedy_templates (bool): Always pick the best scoring template
+                instead of sampling in proportion to the scores
         """
         self.templates_dir = templates_dir
+        self.deterministic = deterministic
+        self.seed = seed
+        self.render_cache = render_cache
+        self.render_workers = render_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._render_executor = None
+        self.encode_options = dict(ENCODE_DEFAULTS)
+        self.encode_options = self._resolve_encode_options(encode_options)
+        self.captions_path = captions_path
+        self.greedy_templates = greedy_templates
+        self._caption_index = None
+        self._caption_index_lock = threading.Lock()
+        
+        # Decoded templates, reused across renders
+        self.template_cache = TemplateCache(max_bytes=template_cache_bytes)
         
         # Create templates directory if it doesn't exist
         os.makedirs(self.templates_dir, exist_ok=True)
         
-        # Load template mappings
-        self.template_mappings = self._load_template_mappings()
+        # Make sure template mappings exist (writes the defaults if missing)
+        self._load_template_mappings()
         
         # Default font for text
         self.default_font_path = self._get_default_font_path()
+        
+        # Caption wrapping and font size fitting
+        self.layout_engine = CaptionLayoutEngine(self.default_font_path)
+        
+        # Index templates and mappings once; missing templates get placeholders
+        # here, outside the templates directory
+        self.template_index = TemplateIndex(self.templates_dir, self._create_placeholder_template)
+        
+        # Parse the font once for every size the templates need
+        self.warm_font_cache()
+    
+    @property
+    def template_mappings(self):
+        """dict: Mappings between meme templates and NLP characteristics."""
+        return self.template_index.mappings
+    
+    def reload_templates(self):
+        """Reload the template index and drop cached bitmaps after templates changed on disk."""
+        self.template_index.reload()
+        self.template_cache.invalidate()
+        self.warm_font_cache()
+    
+    def ingest_templates(self, source_dirs, max_dimension=1024):
+        """
+        Normalize template images into the templates directory and reload.
+        
+        Templates are converted to RGB JPEGs no larger than max_dimension on
+        either side, and their text-safe caption regions are recorded in
+        manifest.json, so render cost does not depend on the uploaded size.
+        
+        Args:
+            source_dirs (list): Directories containing original template images;
+                may include the templates directory itself
+            max_dimension (int): Longest allowed side in pixels
+            
+        Returns:
+            dict: The updated manifest
+        """
+        from .ingest import ingest_templates
+        
+        manifest = ingest_templates(source_dirs, self.templates_dir, max_dimension)
+        self.reload_templates()
+        return manifest
     
     def _load_template_mappings(self):
         """
@@ -121,6 +356,41 @@ class MemeGenerator:
         # Return a placeholder path that will be checked at runtime
         return os.path.join(fonts_dir, "impact.ttf")
     
+    def _caption_font_size(self, width):
+        """
+        Get the caption font size for an image width.
+        
+        Args:
+            width (int): Image width in pixels
+            
+        Returns:
+            int: Font size in pixels
+        """
+        return width // 10  # Scale font size based on image width
+    
+    def warm_font_cache(self):
+        """Preload the default font at the caption sizes of the indexed templates."""
+        sizes = {40}  # Placeholder template font size
+        
+        for name in self.template_index.template_names():
+            width, _ = self.template_index.size(name)
+            sizes.add(self._caption_font_size(width))
+        
+        warm_fonts(self.default_font_path, sizes)
+    
+    def warm_template_cache(self):
+        """
+        Decode the indexed templates into the template cache, up to its budget.
+        
+        Used to preload templates before forking worker processes, so the
+        decoded bitmaps are shared copy-on-write between them.
+        """
+        for name in self.template_index.template_names():
+            try:
+                self.template_cache.warm(self.template_index.path(name), mtime=self.template_index.mtime(name))
+            except OSError:
+                continue
+    
     def select_template(self, nlp_params):
         """
         Select an appropriate meme template based on NLP analysis.
@@ -131,49 +401,24 @@ class MemeGenerator:
         Returns:
             str: Path to selected template image
         """
-        # Extract parameters
-        sentiment = nlp_params.get("sentiment", "neutral")
-        tone = nlp_params.get("tone", "neutral")
-        topic = nlp_params.get("topic", "general")
-        emotions = nlp_params.get("emotions", [])
-        
-        candidate_templates = set()
+        # Score every mapped template against the analysis in one matrix product
+        scorer = self.template_index.scorer
+        scores = scorer.score(nlp_params)
         
-        # Add templates matching sentiment
-        if sentiment in self.template_mappings.get("sentiment", {}):
-            candidate_templates.update(self.template_mappings["sentiment"][sentiment])
-        
-        # Add templates matching tone
-        if tone in self.template_mappings.get("tone", {}):
-            candidate_templates.update(self.template_mappings["tone"][tone])
-        
-        # Add templates matching topic
-        if topic in self.template_mappings.get("topic", {}):
-            candidate_templates.update(self.template_mappings["topic"][topic])
+        if self.deterministic:
+            # Same text and mappings always give the same template
+            rng = random.Random(f"{self.seed}:{nlp_params.get('text', '')}")
+        else:
+            rng = random
         
-        # Add templates matching emotions (if available)
-        for emotion in emotions:
-            if emotion in self.template_mappings.get("emotion", {}):
-                candidate_templates.update(self.template_mappings["emotion"][emotion])
+        template_name = scorer.choose(scores, rng, greedy=self.greedy_templates)
         
         # If no templates match, use a default set
-        if not candidate_templates:
-            default_templates = [
-                "confused_nick_young.jpg", 
-                "thinking_face.jpg", 
-                "surprised_pikachu.jpg"
-            ]
-            template_name = random.choice(default_templates)
-        else:
-            template_name = random.choice(list(candidate_templates))
+        if template_name is None:
+            template_name = rng.choice(sorted(DEFAULT_TEMPLATES))
         
-        # Check if template exists
-        template_path = os.path.join(self.templates_dir, template_name)
-        if not os.path.exists(template_path):
-            # Template doesn't exist, create a placeholder
-            self._create_placeholder_template(template_path, template_name)
-        
-        return template_path
+        # Missing templates already got placeholders when the index was loaded
+        return self.template_index.path(template_name)
     
     def _create_placeholder_template(self, template_path, template_name):
         """
@@ -183,16 +428,15 @@ class MemeGenerator:
             template_path (str): Path where the template should be saved
             template_name (str): Name of the template
         """
+        from PIL import Image, ImageDraw
+        
         # Create a simple image with text
         width, height = 800, 600
         image = Image.new('RGB', (width, height), color=(255, 255, 255))
         draw = ImageDraw.Draw(image)
         
-        # Try to use the default font, or use a simple font if not available
-        try:
-            font = ImageFont.truetype(self.default_font_path, 40)
-        except:
-            font = ImageFont.load_default()
+        # Use the cached default font (falls back to a simple font if not available)
+        font = get_font(self.default_font_path, 40)
         
         # Draw template name
         draw.text((width // 2, height // 2), f"Placeholder for\n{template_name}", 
@@ -230,67 +474,520 @@ class MemeGenerator:
         
         return top_text, bottom_text
     
-    def create_meme(self, nlp_params, output_path=None):
+    @property
+    def caption_index(self):
+        """CaptionIndex: Curated captions from captions_path, or None if not configured."""
+        if self._caption_index is None and self.captions_path is not None:
+            with self._caption_index_lock:
+                if self._caption_index is None:
+                    from .captions import load_caption_index
+                    self._caption_index = load_caption_index(self.captions_path)
+        return self._caption_index
+    
+    def suggest_captions(self, nlp_params, k=3):
         """
-        Create a meme based on NLP analysis parameters.
+        Suggest curated captions matching the NLP analysis.
         
         Args:
             nlp_params (dict): Parameters from NLP analysis
-            output_path (str, optional): Path to save the generated meme
+            k (int): Maximum number of suggestions
             
         Returns:
-            str: Path to the generated meme
+            list: Dicts with 'caption', 'meme' and 'score', best match first;
+            empty if no captions_path is configured
+        """
+        index = self.caption_index
+        if index is None:
+            return []
+        
+        # Query with the text itself plus the detected topic and emotions
+        keywords = list(nlp_params.get("emotions", []))
+        if nlp_params.get("topic", "general") != "general":
+            keywords.append(nlp_params["topic"])
+        
+        with stage("meme.captions"):
+            return index.search(nlp_params.get("text", ""), keywords=keywords, k=k)
+    
+    def _plan_meme(self, nlp_params):
+        """
+        Choose the template and caption for a meme.
+        
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+            
+        Returns:
+            tuple: (template_path, top_text, bottom_text)
         """
         # Select template
-        template_path = self.select_template(nlp_params)
+        with stage("meme.select"):
+            template_path = self.select_template(nlp_params)
         
         # Generate caption
         top_text, bottom_text = self.generate_caption(nlp_params)
         
-        # Create output path if not provided
-        if output_path is None:
-            output_dir = os.path.join(os.path.dirname(self.templates_dir), "output")
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, f"meme_{random.randint(1000, 9999)}.jpg")
+        return template_path, top_text, bottom_text
+    
+    def _render_key(self, template_path, top_text, bottom_text, encode_options):
+        """
+        Hash everything that determines a rendered meme's pixels.
         
-        # Load template image
+        Args:
+            template_path (str): Path to the template image
+            top_text (str): Top caption
+            bottom_text (str): Bottom caption
+            encode_options (dict): Complete encode options
+            
+        Returns:
+            str: Hex digest identifying the render
+        """
+        template_name = os.path.basename(template_path)
+        width, _ = self.template_index.size(template_name) or (800, 600)
+        font_size = bucket_font_size(self._caption_font_size(width))
+        
+        parts = [
+            str(RENDER_VERSION),
+            template_name,
+            str(self.template_index.mtime(template_name)),
+            json.dumps(self.template_index.regions(template_name), sort_keys=True),
+            top_text,
+            bottom_text,
+            self.default_font_path,
+            str(font_size),
+            json.dumps(encode_options, sort_keys=True)
+        ]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    
+    def render_meme(self, nlp_params):
+        """
+        Render a meme in memory based on NLP analysis parameters.
+        
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+            
+        Returns:
+            PIL.Image.Image: The rendered meme
+        """
+        return self._draw_meme(*self._plan_meme(nlp_params))
+    
+    def _draw_meme(self, template_path, top_text, bottom_text):
+        """
+        Draw the captions onto a copy of the template.
+        
+        Args:
+            template_path (str): Path to the template image
+            top_text (str): Top caption
+            bottom_text (str): Bottom caption
+            
+        Returns:
+            PIL.Image.Image: The rendered meme
+        """
+        # Get a private copy of the decoded template (the index knows its mtime)
+        template_mtime = self.template_index.mtime(os.path.basename(template_path))
         try:
-            img = Image.open(template_path)
-        except:
+            with stage("meme.decode"):
+                img = self.template_cache.get(template_path, mtime=template_mtime)
+        except OSError:
             # If template can't be loaded, create a blank image
+            from PIL import Image
             img = Image.new('RGB', (800, 600), color=(255, 255, 255))
         
+        with stage("meme.draw"):
+            self._draw_captions(img, os.path.basename(template_path), top_text, bottom_text)
+        
+        return img
+    
+    def _draw_captions(self, img, template_name, top_text, bottom_text):
+        """
+        Fit and draw the top and bottom captions onto an image, in place.
+        
+        Args:
+            img (PIL.Image.Image): The template copy to draw on
+            template_name (str): Template file name, for its caption regions
+            top_text (str): Top caption
+            bottom_text (str): Bottom caption
+        """
         # Prepare for drawing
+        from PIL import ImageDraw
         draw = ImageDraw.Draw(img)
         width, height = img.size
         
-        # Try to use the default font, or use a simple font if not available
-        try:
-            font_size = width // 10  # Scale font size based on image width
-            font = ImageFont.truetype(self.default_font_path, font_size)
-        except:
-            font = ImageFont.load_default()
-        
-        # Helper function to draw text with outline
-        def draw_text_with_outline(draw, position, text, font):
-            # Draw outline
-            outline_color = (0, 0, 0)
-            for offset_x, offset_y in [(1, 1), (-1, 1), (1, -1), (-1, -1)]:
-                draw.text((position[0] + offset_x, position[1] + offset_y), text, font=font, fill=outline_color, align="center")
-            
-            # Draw text
-            draw.text(position, text, font=font, fill=(255, 255, 255), align="center")
+        # Use the text-safe boxes precomputed at ingest; otherwise keep captions
+        # inside a margin, each using up to 40% of the remaining height
+        regions = self.template_index.regions(template_name)
+        if regions is None or img.size != self.template_index.size(template_name):
+            regions = caption_regions(width, height)
+        max_font_size = self._caption_font_size(width)
         
-        # Draw top text
+        # Draw top text, hanging from the top of its box
         if top_text:
-            draw_text_with_outline(draw, (width // 2, height // 10), top_text.upper(), font)
+            box = regions["top"]
+            font, lines, line_height, stroke_width = self._fit_caption(draw, top_text.upper(), box[2] - box[0], box[3] - box[1], max_font_size)
+            self._draw_caption(draw, lines, font, box, box[1], line_height, stroke_width)
         
-        # Draw bottom text
+        # Draw bottom text, resting on the bottom of its box
         if bottom_text:
-            draw_text_with_outline(draw, (width // 2, height - height // 10), bottom_text.upper(), font)
+            box = regions["bottom"]
+            font, lines, line_height, stroke_width = self._fit_caption(draw, bottom_text.upper(), box[2] - box[0], box[3] - box[1], max_font_size)
+            top = box[3] - line_height * len(lines)
+            self._draw_caption(draw, lines, font, box, top, line_height, stroke_width)
+    
+    def _fit_caption(self, draw, text, max_width, max_height, max_font_size):
+        """
+        Choose the caption font size and wrap the caption into lines.
+        
+        Args:
+            draw (ImageDraw.ImageDraw): Drawing context used for measuring
+            text (str): The caption text
+            max_width (int): Caption box width in pixels
+            max_height (int): Caption box height in pixels
+            max_font_size (int): Largest font size to use
+            
+        Returns:
+            tuple: (font, lines, line_height, stroke_width)
+        """
+        if self.layout_engine.scalable:
+            font_size, lines, line_height = self.layout_engine.fit(text, max_width, max_height, max_font_size)
+            return get_font(self.default_font_path, font_size), lines, line_height, _stroke_width(font_size)
+        
+        # Fallback font can't be scaled; wrap at its fixed size
+        font = get_font(self.default_font_path, max_font_size)
+        stroke_width = _stroke_width(max_font_size)
+        lines = self._layout_caption(draw, text, font, max_width)
+        return font, lines, self._line_height(font, stroke_width), stroke_width
+    
+    def _line_height(self, font, stroke_width):
+        """
+        Get the vertical distance between caption lines.
+        
+        Args:
+            font: The caption font
+            stroke_width (int): Outline width in pixels
+            
+        Returns:
+            int: Line height in pixels
+        """
+        _, top, _, bottom = font.getbbox("Ag", stroke_width=stroke_width)
+        return bottom - min(top, 0) + 4  # Same spacing as Pillow's multiline text
+    
+    def _layout_caption(self, draw, text, font, max_width):
+        """
+        Wrap a caption into lines that fit the given width.
+        
+        Args:
+            draw (ImageDraw.ImageDraw): Drawing context used for measuring
+            text (str): The caption text
+            font: The caption font
+            max_width (int): Maximum line width in pixels
+            
+        Returns:
+            list: (line, line_width) tuples
+        """
+        lines = []
+        current = []
+        for word in text.split():
+            candidate = " ".join(current + [word])
+            if current and draw.textlength(candidate, font=font) > max_width:
+                lines.append(" ".join(current))
+                current = [word]
+            else:
+                current.append(word)
+        if current:
+            lines.append(" ".join(current))
+        
+        return [(line, draw.textlength(line, font=font)) for line in lines]
+    
+    def _draw_caption(self, draw, lines, font, box, top, line_height, stroke_width):
+        """
+        Draw laid-out caption lines, centered in their box, with a black outline.
+        
+        Each line is rasterized once: Pillow draws the outline and the fill
+        from the same glyph masks via stroke_width/stroke_fill.
+        
+        Args:
+            draw (ImageDraw.ImageDraw): Drawing context
+            lines (list): (line, line_width) tuples from _layout_caption
+            font: The caption font
+            box (tuple): Caption box as (left, top, right, bottom)
+            top (int): Y coordinate of the first line
+            line_height (int): Distance between lines in pixels
+            stroke_width (int): Outline width in pixels
+        """
+        y = top
+        for line, line_width in lines:
+            draw.text(
+                ((box[0] + box[2] - line_width) / 2, y), line, font=font, fill=(255, 255, 255),
+                stroke_width=stroke_width, stroke_fill=(0, 0, 0)
+            )
+            y += line_height
+    
+    def _resolve_encode_options(self, encode_options=None, image_format=None):
+        """
+        Merge per-call encode options over the generator's defaults.
+        
+        Args:
+            encode_options (dict, optional): Overrides for the default options
+            image_format (str, optional): Shortcut to override only the format
+            
+        Returns:
+            dict: Complete encode options
+            
+        Raises:
+            ValueError: If the format is not supported
+        """
+        options = dict(self.encode_options)
+        options.update(encode_options or {})
+        if image_format is not None:
+            options["format"] = image_format
+        options["format"] = options["format"].upper()
+        
+        if options["format"] not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported image format: {options['format']}")
+        return options
+    
+    def _save_args(self, options):
+        """Translate encode options into Pillow save() keyword arguments."""
+        image_format = options["format"]
+        
+        if image_format == "JPEG":
+            save_args = {
+                "quality": options["quality"],
+                "optimize": options["optimize"],
+                "progressive": options["progressive"]
+            }
+            if options["subsampling"] is not None:
+                save_args["subsampling"] = options["subsampling"]
+        elif image_format == "WEBP":
+            save_args = {"quality": options["quality"]}
+        else:
+            save_args = {"optimize": options["optimize"]}
+        
+        save_args["format"] = image_format
+        return save_args
+    
+    def _encode(self, img, options):
+        """Encode an image into bytes."""
+        buffer = io.BytesIO()
+        with stage("meme.encode"):
+            img.save(buffer, **self._save_args(options))
+        return buffer.getvalue()
+    
+    def _make_thumbnail(self, img, thumbnail_size):
+        """
+        Shrink an already rendered meme into a thumbnail, in place.
+        
+        Args:
+            img (PIL.Image.Image): The rendered meme (modified)
+            thumbnail_size (tuple): Maximum (width, height) of the thumbnail
+            
+        Returns:
+            PIL.Image.Image: The same image, now thumbnail-sized
+        """
+        from PIL import Image
+        
+        with stage("meme.thumbnail"):
+            img.thumbnail(thumbnail_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        return img
+    
+    def _render_cached(self, plan, options, thumbnail_size):
+        """
+        Get a meme (and thumbnail) from the render cache, rendering on a miss.
+        
+        Args:
+            plan (tuple): (template_path, top_text, bottom_text)
+            options (dict): Complete encode options
+            thumbnail_size (tuple, optional): Maximum thumbnail (width, height)
+            
+        Returns:
+            tuple: (meme_path, thumbnail_path); thumbnail_path is None if not requested
+        """
+        extension = FORMAT_EXTENSIONS[options["format"]]
+        key = self._render_key(*plan, options)
+        meme_path = self.render_cache.lookup(key, extension)
+        
+        thumbnail_path = None
+        if thumbnail_size:
+            thumbnail_key = hashlib.sha256(f"{key}:thumbnail:{thumbnail_size[0]}x{thumbnail_size[1]}".encode("utf-8")).hexdigest()
+            thumbnail_path = self.render_cache.lookup(thumbnail_key, extension)
+        
+        if meme_path is None or (thumbnail_size and thumbnail_path is None):
+            img = self._draw_meme(*plan)
+            if meme_path is None:
+                data = self._encode(img, options)
+                with stage("meme.save"):
+                    meme_path = self.render_cache.store(key, data, extension)
+            if thumbnail_size and thumbnail_path is None:
+                data = self._encode(self._make_thumbnail(img, thumbnail_size), options)
+                with stage("meme.save"):
+                    thumbnail_path = self.render_cache.store(thumbnail_key, data, extension)
+        
+        return meme_path, thumbnail_path
+    
+    def render_meme_outputs(self, nlp_params, encode_options=None, thumbnail_size=None):
+        """
+        Render a meme and encode it, plus an optional thumbnail, in memory.
+        
+        The thumbnail is produced from the same rendered image, so the
+        template is only decoded and drawn once.
+        
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+            encode_options (dict, optional): Overrides for the default encode options
+            thumbnail_size (tuple, optional): Maximum thumbnail (width, height)
+            
+        Returns:
+            dict: 'format', 'mime_type', 'image' (bytes) and 'thumbnail' (bytes or None)
+        """
+        options = self._resolve_encode_options(encode_options)
+        outputs = {
+            "format": options["format"],
+            "mime_type": FORMAT_MIME_TYPES[options["format"]],
+            "image": None,
+            "thumbnail": None
+        }
+        
+        if self.render_cache is not None:
+            # Serve identical renders from the content-addressed store
+            meme_path, thumbnail_path = self._render_cached(self._plan_meme(nlp_params), options, thumbnail_size)
+            with open(meme_path, 'rb') as f:
+                outputs["image"] = f.read()
+            if thumbnail_path is not None:
+                with open(thumbnail_path, 'rb') as f:
+                    outputs["thumbnail"] = f.read()
+            return outputs
+        
+        img = self.render_meme(nlp_params)
+        outputs["image"] = self._encode(img, options)
+        if thumbnail_size:
+            outputs["thumbnail"] = self._encode(self._make_thumbnail(img, thumbnail_size), options)
+        
+        return outputs
+    
+    def render_meme_bytes(self, nlp_params, image_format=None, encode_options=None):
+        """
+        Render a meme and encode it into an in-memory buffer.
+        
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+            image_format (str, optional): Image format (JPEG, WEBP or PNG); overrides encode_options
+            encode_options (dict, optional): Overrides for the default encode options
+            
+        Returns:
+            bytes: The encoded meme image
+        """
+        options = self._resolve_encode_options(encode_options, image_format)
+        return self.render_meme_outputs(nlp_params, options)["image"]
+    
+    def create_meme_with_thumbnail(self, nlp_params, output_path=None, thumbnail_size=None, encode_options=None):
+        """
+        Create a meme and, optionally, a thumbnail of it on disk.
+        
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+            output_path (str, optional): Path to save the generated meme; when
+                omitted and a render cache is configured, the meme is stored
+                under its content address and reused by identical requests
+            thumbnail_size (tuple, optional): Maximum thumbnail (width, height);
+                the thumbnail is saved next to the meme with a "_thumb" suffix
+            encode_options (dict, optional): Overrides for the default encode options
+            
+        Returns:
+            tuple: (meme_path, thumbnail_path); thumbnail_path is None if not requested
+        """
+        options = self._resolve_encode_options(encode_options)
+        
+        if output_path is None and self.render_cache is not None:
+            return self._render_cached(self._plan_meme(nlp_params), options, thumbnail_size)
+        
+        img = self.render_meme(nlp_params)
+        
+        # Create output path if not provided
+        if output_path is None:
+            output_dir = os.path.join(os.path.dirname(self.templates_dir), "output")
+            os.makedirs(output_dir, exist_ok=True)
+            extension = FORMAT_EXTENSIONS[options["format"]]
+            output_path = os.path.join(output_dir, f"meme_{random.randint(1000, 9999)}{extension}")
         
-        # Save the meme
+        # Save the meme (encoding and writing in one step)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        img.save(output_path)
+        with stage("meme.save"):
+            img.save(output_path, **self._save_args(options))
+        
+        # Save the thumbnail from the same rendered image
+        thumbnail_path = None
+        if thumbnail_size:
+            root, extension = os.path.splitext(output_path)
+            thumbnail_path = f"{root}_thumb{extension}"
+            thumbnail = self._make_thumbnail(img, thumbnail_size)
+            with stage("meme.save"):
+                thumbnail.save(thumbnail_path, **self._save_args(options))
+        
+        return output_path, thumbnail_path
+    
+    def create_meme(self, nlp_params, output_path=None, encode_options=None):
+        """
+        Create a meme based on NLP analysis parameters.
         
-        return output_path 
\ No newline at end of file
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+            output_path (str, optional): Path to save the generated meme; when
+                omitted and a render cache is configured, the meme is stored
+                under its content address and reused by identical requests
+            encode_options (dict, optional): Overrides for the default encode options
+            
+        Returns:
+            str: Path to the generated meme
+        """
+        meme_path, _ = self.create_meme_with_thumbnail(nlp_params, output_path, encode_options=encode_options)
+        return meme_path
+    
+    def _get_render_executor(self):
+        """Start the render thread pool on first use."""
+        if self._render_executor is None:
+            self._render_executor = ThreadPoolExecutor(
+                max_workers=self.render_workers,
+                thread_name_prefix="meme-render"
+            )
+        return self._render_executor
+    
+    def iter_create_memes(self, params_list, output_paths=None):
+        """
+        Create many memes on the render thread pool, yielding each as it finishes.
+        
+        Templates and fonts are shared across the batch through the
+        generator's caches.
+        
+        Args:
+            params_list (list): Parameters from NLP analysis, one dict per meme
+            output_paths (list, optional): Path to save each meme; defaults are
+                chosen as in create_meme when omitted
+            
+        Yields:
+            tuple: (index, path) for each meme, in completion order
+        """
+        if output_paths is None:
+            output_paths = [None] * len(params_list)
+        
+        executor = self._get_render_executor()
+        futures = {
+            executor.submit(self.create_meme, nlp_params, output_path): index
+            for index, (nlp_params, output_path) in enumerate(zip(params_list, output_paths))
+        }
+        
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    
+    def create_memes(self, params_list, output_paths=None):
+        """
+        Create many memes in parallel.
+        
+        Args:
+            params_list (list): Parameters from NLP analysis, one dict per meme
+            output_paths (list, optional): Path to save each meme
+            
+        Returns:
+            list: Paths to the generated memes, in the same order as the input
+        """
+        paths = [None] * len(params_list)
+        for index, path in self.iter_create_memes(params_list, output_paths):
+            paths[index] = path
+        return paths 
\ No newline at end of file
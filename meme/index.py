@@ -0,0 +1,365 @@
+"""
+Template Index Module
+
+This module builds an in-memory index of the meme templates on disk and the
+category mappings in mappings.json, so that template selection in the MemeMind
+generator never touches the filesystem.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# File extensions recognized as template images
+TEMPLATE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+# Written by meme.ingest next to normalized templates
+MANIFEST_NAME = "manifest.json"
+
+# Templates used when no mapping matches the analysis
+DEFAULT_TEMPLATES = (
+    "confused_nick_young.jpg",
+    "thinking_face.jpg",
+    "surprised_pikachu.jpg"
+)
+
+def caption_regions(width, height):
+    """
+    Get the default top and bottom caption boxes for an image size.
+
+    Captions stay inside a 5% margin, and each may use up to 40% of the
+    remaining height so top and bottom captions never overlap.
+
+    Args:
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+
+    Returns:
+        dict: 'top' and 'bottom' boxes as [left, top, right, bottom]
+    """
+    margin_x, margin_y = width // 20, height // 20
+    band = (height - 2 * margin_y) * 2 // 5
+    return {
+        "top": [margin_x, margin_y, width - margin_x, margin_y + band],
+        "bottom": [margin_x, height - margin_y - band, width - margin_x, height - margin_y]
+    }
+
+def _private_placeholder_dir():
+    """
+    Create a temporary directory for placeholders, removed when the process exits.
+
+    Only the creating process removes it, so forked workers that inherit the
+    index keep using it until the parent shuts down.
+
+    Returns:
+        str: Path to the new directory (readable by the current user only)
+    """
+    directory = tempfile.mkdtemp(prefix="mememind-placeholders-")
+    owner = os.getpid()
+
+    def _remove():
+        if os.getpid() == owner:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    atexit.register(_remove)
+    return directory
+
+class _Snapshot:
+    """Immutable view of the templates directory at one point in time."""
+
+    def __init__(self, mappings, templates, placeholders, scorer, signature):
+        self.mappings = mappings
+        self.templates = templates
+        self.placeholders = placeholders
+        self.scorer = scorer
+        self.signature = signature
+
+class TemplateIndex:
+    """
+    Index of available templates and the scoring matrix compiled from the mappings.
+
+    The index is loaded once from the templates directory and mappings.json.
+    It is refreshed with reload(), or automatically by a background watcher
+    started with watch(). Lookups read an immutable snapshot, so they are safe
+    to use while a reload is in progress.
+    """
+
+    def __init__(self, templates_dir, placeholder_factory=None, placeholder_dir=None):
+        """
+        Initialize and load the template index.
+
+        Args:
+            templates_dir (str): Directory containing meme templates and mappings.json
+            placeholder_factory (callable, optional): Called as factory(path, name) to
+                create an image for mapped templates that are missing on disk
+            placeholder_dir (str, optional): Directory the placeholders are created
+                in, kept apart from templates_dir so they are never listed as
+                templates; by default a private temporary directory removed at exit
+        """
+        self.templates_dir = templates_dir
+        self.placeholder_factory = placeholder_factory
+        self.placeholder_dir = placeholder_dir
+
+        # Placeholders written by this index; anything else found in
+        # placeholder_dir is regenerated rather than trusted
+        self._own_placeholders = set()
+
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+        self._snapshot = None
+        self.reload()
+
+    @property
+    def mappings(self):
+        """dict: The category mappings loaded from mappings.json."""
+        return self._snapshot.mappings
+
+    def _mappings_path(self):
+        return os.path.join(self.templates_dir, "mappings.json")
+
+    def _load_mappings(self):
+        """Read mappings.json, returning empty mappings if it cannot be loaded."""
+        try:
+            with open(self._mappings_path(), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load_manifest(self):
+        """Read the ingest manifest, returning no entries if there is none."""
+        try:
+            with open(os.path.join(self.templates_dir, MANIFEST_NAME), 'r') as f:
+                return json.load(f).get("templates", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _scan_signature(self):
+        """
+        Get the modification times of mappings.json, the manifest and every template file.
+
+        Returns:
+            tuple: Sorted (name, mtime) pairs describing the directory state
+        """
+        signature = []
+        try:
+            with os.scandir(self.templates_dir) as entries:
+                for entry in entries:
+                    if entry.name in ("mappings.json", MANIFEST_NAME) or entry.name.lower().endswith(TEMPLATE_EXTENSIONS):
+                        if entry.is_file():
+                            signature.append((entry.name, entry.stat().st_mtime))
+        except FileNotFoundError:
+            pass
+        return tuple(sorted(signature))
+
+    def _mapped_names(self, mappings):
+        """Collect every template name referenced by the mappings."""
+        names = list(DEFAULT_TEMPLATES)
+        for values in mappings.values():
+            if isinstance(values, dict):
+                for templates in values.values():
+                    names.extend(templates)
+        return names
+
+    def reload(self):
+        """
+        Rebuild the index from disk.
+
+        Missing templates referenced by the mappings get placeholders through
+        the placeholder factory here, so requests never write to disk.
+        """
+        # Imported here so importing the index does not load Pillow
+        from PIL import Image
+
+        with self._reload_lock:
+            mappings = self._load_mappings()
+            signature = self._scan_signature()
+
+            # Read dimensions from image headers (pixel data is not decoded)
+            manifest = self._load_manifest()
+            templates = {}
+            for name, mtime in signature:
+                if not name.lower().endswith(TEMPLATE_EXTENSIONS):
+                    continue
+                try:
+                    with Image.open(os.path.join(self.templates_dir, name)) as image:
+                        size = image.size
+                except OSError:
+                    continue
+                templates[name] = {"size": size, "mtime": mtime, "regions": self._manifest_regions(manifest, name, size)}
+
+            # Stand in for mapped templates that don't exist
+            placeholders = {}
+            if self.placeholder_factory is not None:
+                for name in dict.fromkeys(self._mapped_names(mappings)):
+                    if name in templates:
+                        continue
+                    try:
+                        path = self._placeholder(name)
+                        with Image.open(path) as image:
+                            size = image.size
+                        placeholders[name] = {"path": path, "size": size, "mtime": os.path.getmtime(path)}
+                    except OSError:
+                        continue
+
+            # Compile the mappings into the template scoring matrix (imported
+            # here so importing the index does not load NumPy)
+            from .scoring import TemplateScorer
+            scorer = TemplateScorer(mappings)
+
+            self._snapshot = _Snapshot(mappings, templates, placeholders, scorer, signature)
+
+    def _placeholder(self, name):
+        """
+        Get the placeholder image for a missing template.
+
+        The image is created the first time this index needs it, replacing any
+        file of that name already in placeholder_dir, and reused afterwards.
+
+        Args:
+            name (str): Template file name
+
+        Returns:
+            str: Path to the placeholder image
+        """
+        if self.placeholder_dir is None:
+            self.placeholder_dir = _private_placeholder_dir()
+
+        path = os.path.join(self.placeholder_dir, name)
+        if name not in self._own_placeholders or not os.path.exists(path):
+            # Written under a temporary name first, so a reader never sees a
+            # partial image
+            os.makedirs(self.placeholder_dir, exist_ok=True)
+            partial = os.path.join(self.placeholder_dir, f".{os.getpid()}-{threading.get_ident()}-{name}")
+            self.placeholder_factory(partial, name)
+            os.replace(partial, path)
+            self._own_placeholders.add(name)
+        return path
+
+    def _manifest_regions(self, manifest, name, size):
+        """Get a template's caption boxes from the manifest, if they match its size."""
+        entry = manifest.get(name)
+        if not isinstance(entry, dict) or tuple(entry.get("size", ())) != size:
+            return None
+        try:
+            return {region: tuple(value["box"]) for region, value in entry["regions"].items()}
+        except (KeyError, TypeError):
+            return None
+
+    @property
+    def scorer(self):
+        """TemplateScorer: Template scoring matrix compiled from the current mappings."""
+        return self._snapshot.scorer
+
+    def is_available(self, name):
+        """Check whether a template image exists and could be read."""
+        return name in self._snapshot.templates
+
+    def is_placeholder(self, name):
+        """Check whether a mapped template is missing and stood in for by a placeholder."""
+        return name in self._snapshot.placeholders
+
+    def _entry(self, name):
+        """Get the index entry of a template, or of its placeholder."""
+        snapshot = self._snapshot
+        return snapshot.templates.get(name) or snapshot.placeholders.get(name)
+
+    def path(self, name):
+        """
+        Get the image file to render a template from.
+
+        Args:
+            name (str): Template file name
+
+        Returns:
+            str: The template in templates_dir, or its placeholder if it is missing
+        """
+        placeholder = self._snapshot.placeholders.get(name)
+        if placeholder is not None:
+            return placeholder["path"]
+        return os.path.join(self.templates_dir, name)
+
+    def size(self, name):
+        """
+        Get the dimensions of a template or its placeholder.
+
+        Args:
+            name (str): Template file name
+
+        Returns:
+            tuple: (width, height), or None if the template is unavailable
+        """
+        template = self._entry(name)
+        return template["size"] if template else None
+
+    def mtime(self, name):
+        """Get the modification time recorded for a template or its placeholder, or None."""
+        template = self._entry(name)
+        return template["mtime"] if template else None
+
+    def regions(self, name):
+        """
+        Get the precomputed text-safe caption boxes of an ingested template.
+
+        Args:
+            name (str): Template file name
+
+        Returns:
+            dict: 'top' and 'bottom' boxes as (left, top, right, bottom), or
+            None if the template was not ingested or changed size since
+        """
+        template = self._snapshot.templates.get(name)
+        return template["regions"] if template else None
+
+    def template_names(self):
+        """
+        List the available template images.
+
+        Placeholders for missing templates are not included.
+
+        Returns:
+            list: Template file names, sorted
+        """
+        return sorted(self._snapshot.templates)
+
+    def check_for_changes(self):
+        """
+        Reload the index if any template or mappings.json changed on disk.
+
+        Returns:
+            bool: True if the index was reloaded
+        """
+        if self._scan_signature() != self._snapshot.signature:
+            self.reload()
+            return True
+        return False
+
+    def watch(self, interval=5.0):
+        """
+        Start a background thread that reloads the index when files change.
+
+        Args:
+            interval (float): Seconds between directory scans
+        """
+        if self._watcher is not None:
+            return
+
+        self._stop_watching.clear()
+
+        def _watch():
+            while not self._stop_watching.wait(interval):
+                self.check_for_changes()
+
+        self._watcher = threading.Thread(target=_watch, name="template-index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background watcher, if running."""
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,302 @@
+"""
+Template Ingest Module
+
+This module normalizes uploaded meme templates for the MemeMind generator:
+images are converted to RGB, downscaled to a maximum dimension and stored with
+a manifest describing their size and text-safe caption regions. Rendering cost
+is then bounded no matter how large the uploaded originals are.
+
+The caption regions start as the default top and bottom boxes and are
+shrunk toward the image edge while their inner part is busy (high contrast),
+so captions are drawn over calm parts of the picture instead of faces and
+detail in the middle. The generator lays captions out inside these boxes.
+
+Usage:
+    python -m meme.ingest SOURCE_DIR [SOURCE_DIR ...] --output meme/templates --max-dimension 1024
+"""
+
+import argparse
+import json
+import os
+import shutil
+from PIL import Image, ImageStat
+
+from .index import MANIFEST_NAME, TEMPLATE_EXTENSIONS, caption_regions
+
+MANIFEST_VERSION = 2
+
+# Default longest side of a normalized template
+DEFAULT_MAX_DIMENSION = 1024
+
+# Caption boxes are measured in this many horizontal strips
+REGION_STRIPS = 8
+
+# Fewest strips a caption box is shrunk to
+MIN_REGION_STRIPS = 3
+
+# Strips whose grayscale standard deviation is below this are calm enough for
+# outlined text whatever the rest of the box looks like
+CALM_CONTRAST = 24.0
+
+# A strip is busy if its contrast exceeds the calmest kept strip by this factor
+BUSY_CONTRAST_RATIO = 1.5
+
+def normalize_image(image, max_dimension=DEFAULT_MAX_DIMENSION):
+    """
+    Convert an image to RGB and shrink it to fit the maximum dimension.
+
+    Args:
+        image (PIL.Image.Image): The source image
+        max_dimension (int): Longest allowed side in pixels
+
+    Returns:
+        PIL.Image.Image: The normalized image
+    """
+    # Let the JPEG decoder downscale by a power of two before resampling
+    if image.format == "JPEG":
+        image.draft("RGB", (max_dimension, max_dimension))
+
+    image = image.convert("RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return image
+
+def _strip_contrast(grayscale, box, strips):
+    """Measure the contrast (grayscale stddev) of equal horizontal strips of a box."""
+    left, top, right, bottom = box
+    edges = [top + (bottom - top) * i // strips for i in range(strips + 1)]
+    return edges, [
+        ImageStat.Stat(grayscale.crop((left, edges[i], right, max(edges[i + 1], edges[i] + 1)))).stddev[0]
+        for i in range(strips)
+    ]
+
+def safe_regions(image):
+    """
+    Compute text-safe caption boxes for an image.
+
+    Each default box from caption_regions is split into strips, and strips
+    are dropped from its inner edge (the bottom of the top box, the top of
+    the bottom box) while they are busy: above CALM_CONTRAST and
+    BUSY_CONTRAST_RATIO times the calmest strip kept. Boxes keep at least
+    MIN_REGION_STRIPS strips next to the image edge.
+
+    Args:
+        image (PIL.Image.Image): The normalized image
+
+    Returns:
+        dict: 'top' and 'bottom' boxes as [left, top, right, bottom]
+    """
+    grayscale = image.convert("L")
+    regions = caption_regions(*image.size)
+
+    for name, box in regions.items():
+        edges, contrast = _strip_contrast(grayscale, box, REGION_STRIPS)
+
+        # Order the strips from the image edge inward
+        if name == "bottom":
+            contrast = contrast[::-1]
+
+        kept = MIN_REGION_STRIPS
+        calmest = min(contrast[:kept])
+        while kept < REGION_STRIPS:
+            strip = contrast[kept]
+            if strip > CALM_CONTRAST and strip > calmest * BUSY_CONTRAST_RATIO:
+                break
+            calmest = min(calmest, strip)
+            kept += 1
+
+        if name == "top":
+            box[3] = edges[kept]
+        else:
+            box[1] = edges[REGION_STRIPS - kept]
+
+    return regions
+
+def describe_regions(image, regions):
+    """
+    Measure the brightness and busyness of each caption region.
+
+    Bright or busy regions make white outlined text harder to read; the
+    numbers are stored in the manifest for template curation.
+
+    Args:
+        image (PIL.Image.Image): The normalized image
+        regions (dict): Caption boxes from safe_regions
+
+    Returns:
+        dict: Per-region 'box', 'brightness' (0-255) and 'contrast' (stddev)
+    """
+    grayscale = image.convert("L")
+    described = {}
+    for name, box in regions.items():
+        stats = ImageStat.Stat(grayscale.crop(box))
+        described[name] = {
+            "box": box,
+            "brightness": round(stats.mean[0], 1),
+            "contrast": round(stats.stddev[0], 1)
+        }
+    return described
+
+def load_manifest(directory):
+    """
+    Load the ingest manifest of a templates directory.
+
+    Args:
+        directory (str): Templates directory
+
+    Returns:
+        dict: The manifest, or an empty manifest if none exists
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "templates": {}}
+
+    manifest.setdefault("templates", {})
+    return manifest
+
+def _rename_mapped_templates(mappings_path, renames):
+    """
+    Point the category mappings at the new names of re-encoded templates.
+
+    Args:
+        mappings_path (str): mappings.json of the output directory
+        renames (dict): Original file name -> normalized file name
+    """
+    try:
+        with open(mappings_path, 'r') as f:
+            mappings = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    changed = False
+    for values in mappings.values():
+        if not isinstance(values, dict):
+            continue
+        for value, names in values.items():
+            renamed = [renames.get(name, name) for name in names]
+            if renamed != names:
+                values[value] = renamed
+                changed = True
+
+    if changed:
+        with open(mappings_path, 'w') as f:
+            json.dump(mappings, f, indent=2)
+
+def ingest_templates(source_dirs, output_dir, max_dimension=DEFAULT_MAX_DIMENSION, quality=90):
+    """
+    Normalize template images into a directory and update its manifest.
+
+    Templates are stored as JPEGs. A JPEG keeps its file name; other formats
+    are renamed to <stem>.jpg and the output mappings.json is updated to the
+    new name. Originals in the output directory itself are replaced by their
+    normalized copy. A template whose normalized name was already taken by
+    another source in the same run is skipped and reported.
+
+    Sources that have not changed since they were last ingested at the same
+    max_dimension are skipped. Templates already within bounds in the output
+    directory itself are recorded without re-encoding.
+
+    Args:
+        source_dirs (list): Directories containing original template images
+        output_dir (str): Directory receiving normalized templates and manifest.json
+        max_dimension (int): Longest allowed side in pixels
+        quality (int): JPEG quality of re-encoded templates
+
+    Returns:
+        dict: The updated manifest
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    if manifest.get("version") != MANIFEST_VERSION:
+        # Entries of older versions have stale caption regions
+        manifest = {"version": MANIFEST_VERSION, "templates": {}}
+    templates = manifest["templates"]
+    output_mappings_path = os.path.join(output_dir, "mappings.json")
+
+    # Normalized name -> source claiming it in this run, and renamed originals
+    claimed = {}
+    renames = {}
+
+    for source_dir in source_dirs:
+        # Keep the category mappings alongside the normalized templates
+        mappings_path = os.path.join(source_dir, "mappings.json")
+        if os.path.exists(mappings_path) and not os.path.exists(output_mappings_path):
+            shutil.copyfile(mappings_path, output_mappings_path)
+
+        for filename in sorted(os.listdir(source_dir)):
+            if not filename.lower().endswith(TEMPLATE_EXTENSIONS):
+                continue
+
+            source_path = os.path.join(source_dir, filename)
+            stem, extension = os.path.splitext(filename)
+            name = filename if extension.lower() in (".jpg", ".jpeg") else stem + ".jpg"
+            output_path = os.path.join(output_dir, name)
+
+            # Two sources normalizing to the same name would overwrite each other
+            if name in claimed:
+                print(f"Skipping {source_path}: {name} is already ingested from {claimed[name]}")
+                continue
+            claimed[name] = source_path
+            if name != filename:
+                renames[filename] = name
+
+            source_mtime = os.path.getmtime(source_path)
+            entry = templates.get(name)
+            if (entry is not None and entry.get("source") == os.path.abspath(source_path)
+                    and entry.get("source_mtime") == source_mtime
+                    and entry.get("max_dimension") == max_dimension
+                    and os.path.exists(output_path)):
+                continue
+
+            try:
+                with Image.open(source_path) as source:
+                    original_size = source.size
+                    in_place = os.path.abspath(source_path) == os.path.abspath(output_path)
+                    already_normal = (source.format == "JPEG" and source.mode == "RGB"
+                                      and max(source.size) <= max_dimension)
+                    image = normalize_image(source, max_dimension)
+            except OSError as e:
+                print(f"Skipping {source_path}: {e}")
+                continue
+
+            # Avoid a lossy re-encode of templates that are already normalized in place
+            if not (in_place and already_normal):
+                image.save(output_path, format="JPEG", quality=quality, optimize=True)
+
+            # A renamed original in the output directory is replaced by its copy
+            if os.path.dirname(os.path.abspath(source_path)) == os.path.abspath(output_dir) and not in_place:
+                os.remove(source_path)
+
+            templates[name] = {
+                "source": os.path.abspath(source_path),
+                "source_mtime": os.path.getmtime(source_path) if in_place else source_mtime,
+                "max_dimension": max_dimension,
+                "original_size": list(original_size),
+                "size": list(image.size),
+                "regions": describe_regions(image, safe_regions(image))
+            }
+
+    if renames:
+        _rename_mapped_templates(output_mappings_path, renames)
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+def main(argv=None):
+    """Command-line entry point for template ingest."""
+    parser = argparse.ArgumentParser(description="Normalize meme templates and write a manifest.")
+    parser.add_argument("sources", nargs="+", help="Directories containing original template images")
+    parser.add_argument("--output", default="meme/templates", help="Directory for normalized templates")
+    parser.add_argument("--max-dimension", type=int, default=DEFAULT_MAX_DIMENSION,
+                        help="Longest side of a normalized template in pixels")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG quality of normalized templates")
+    args = parser.parse_args(argv)
+
+    manifest = ingest_templates(args.sources, args.output, args.max_dimension, args.quality)
+    print(f"Ingested {len(manifest['templates'])} templates into {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Template Scoring Module
+
+This module ranks meme templates against an NLP analysis for the MemeMind
+generator. The category mappings in mappings.json are compiled once into a
+feature x template weight matrix; a request's sentiment, tone, topic and
+emotions select a few feature rows, and one vector-matrix product gives every
+template's score. Templates matching several signals score higher than ones
+matching a single signal, instead of all matches being equally likely.
+"""
+
+import numpy as np
+
+# Weight of a match per mapping category; specific signals (emotion, topic)
+# say more about the right template than the coarse overall sentiment
+CATEGORY_WEIGHTS = {
+    "emotion": 1.5,
+    "topic": 1.25,
+    "tone": 1.0,
+    "sentiment": 0.75
+}
+
+# Weight of the first, second, ... detected emotion
+EMOTION_RANK_WEIGHTS = (1.0, 0.5)
+
+# Sampling probability is proportional to score ** SHARPNESS (a power of
+# two), so templates matching more signals are strongly preferred but
+# others still appear
+SHARPNESS = 4
+
+class TemplateScorer:
+    """
+    Scores every mapped template against an analysis with one matrix product.
+
+    Built from a mappings snapshot and read-only afterwards, so it can be
+    shared by every thread.
+    """
+
+    def __init__(self, mappings, category_weights=CATEGORY_WEIGHTS):
+        """
+        Compile the mappings into a weight matrix.
+
+        Args:
+            mappings (dict): Category -> value -> template names, as in mappings.json
+            category_weights (dict): Weight of a match per category (default 1.0)
+        """
+        features = {}
+        entries = []
+        names = set()
+        for category, values in mappings.items():
+            if not isinstance(values, dict):
+                continue
+            weight = category_weights.get(category, 1.0)
+            for value, templates in values.items():
+                row = features.setdefault((category, value), len(features))
+                for name in templates:
+                    entries.append((row, name, weight))
+                    names.add(name)
+
+        # Sorted so choices do not depend on the order of mappings.json
+        self.templates = tuple(sorted(names))
+        self.features = features
+        columns = {name: column for column, name in enumerate(self.templates)}
+
+        # Feature rows, so a request only touches the rows of its own signals
+        self.weights = np.zeros((len(features), len(self.templates)), dtype=np.float32)
+        for row, name, weight in entries:
+            self.weights[row, columns[name]] = weight
+
+    def __len__(self):
+        """Return the number of scored templates."""
+        return len(self.templates)
+
+    def feature_vector(self, nlp_params):
+        """
+        Encode an analysis as weighted feature rows.
+
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+
+        Returns:
+            tuple: (row indices, coefficients) of the features present in the mappings
+        """
+        signals = [
+            ("sentiment", nlp_params.get("sentiment", "neutral"), 1.0),
+            ("tone", nlp_params.get("tone", "neutral"), 1.0),
+            ("topic", nlp_params.get("topic", "general"), 1.0)
+        ]
+        for emotion, weight in zip(nlp_params.get("emotions", []), EMOTION_RANK_WEIGHTS):
+            signals.append(("emotion", emotion, weight))
+
+        rows = []
+        coefficients = []
+        for category, value, weight in signals:
+            row = self.features.get((category, value))
+            if row is not None:
+                rows.append(row)
+                coefficients.append(weight)
+        return rows, coefficients
+
+    def score(self, nlp_params):
+        """
+        Score every template against an analysis.
+
+        Args:
+            nlp_params (dict): Parameters from NLP analysis
+
+        Returns:
+            numpy.ndarray: Score per template, in self.templates order
+        """
+        rows, coefficients = self.feature_vector(nlp_params)
+        if not rows:
+            return np.zeros(len(self.templates), dtype=np.float32)
+        return np.asarray(coefficients, dtype=np.float32) @ self.weights[rows]
+
+    def choose(self, scores, rng, greedy=False):
+        """
+        Pick a template from its scores.
+
+        Args:
+            scores (numpy.ndarray): Scores from score()
+            rng: Source of randomness with a random() method, e.g. the
+                random module or a seeded random.Random
+            greedy (bool): Take the best template (the first one on ties)
+                instead of sampling
+
+        Returns:
+            str: Template name, or None if no template scored above zero
+        """
+        if not len(scores) or scores.max() <= 0:
+            return None
+
+        if greedy:
+            return self.templates[int(np.argmax(scores))]
+
+        # Raise to SHARPNESS by repeated squaring, which is much cheaper than a power
+        weights = np.maximum(scores, 0)
+        for _ in range(SHARPNESS.bit_length() - 1):
+            weights *= weights
+        cumulative = np.cumsum(weights)
+        column = int(np.searchsorted(cumulative, rng.random() * cumulative[-1], side="right"))
+        return self.templates[min(column, len(self.templates) - 1)]
@@ -0,0 +1,12 @@
+"""
+Metrics package for MemeMind meme generator.
+
+This package provides low-overhead timing of the analysis and rendering stages.
+"""
+
+from .stages import Histogram, StageMetrics, clock, stage, stage_metrics, format_server_timing
+from .caches import render_cache_metrics
+from .profiling import RequestProfiler, collapsed_stacks, write_profile
+
+__all__ = ['Histogram', 'StageMetrics', 'clock', 'stage', 'stage_metrics', 'format_server_timing', 'render_cache_metrics',
+           'RequestProfiler', 'collapsed_stacks', 'write_profile'] 
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Cache Metrics Module
+
+This module renders the statistics of the MemeMind caches (analysis results,
+decoded templates, rendered memes) in the Prometheus text exposition format.
+"""
+
+# Cache stats field -> (metric suffix, Prometheus type, help text)
+CACHE_FIELDS = {
+    "entries": ("entries", "gauge", "Entries held by each cache."),
+    "files": ("entries", "gauge", "Entries held by each cache."),
+    "bytes": ("bytes", "gauge", "Approximate bytes held by each cache."),
+    "hits": ("hits_total", "counter", "Cache lookups that found an entry."),
+    "misses": ("misses_total", "counter", "Cache lookups that found no entry."),
+    "evictions": ("evictions_total", "counter", "Entries evicted to stay within budget."),
+    "expirations": ("expirations_total", "counter", "Entries dropped after their TTL.")
+}
+
+def render_cache_metrics(caches, prefix="mememind_cache"):
+    """
+    Render cache statistics in the Prometheus text exposition format.
+
+    Args:
+        caches (dict): Cache name -> stats() dict of that cache
+        prefix (str): Metric name prefix
+
+    Returns:
+        str: The rendered metric families, including a hit ratio per cache
+    """
+    # Metric suffix -> [(cache name, value)], in first-seen order
+    families = {}
+    for cache_name, stats in caches.items():
+        for field, value in stats.items():
+            if field in CACHE_FIELDS:
+                families.setdefault(CACHE_FIELDS[field][0], []).append((cache_name, value))
+
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        hit_ratio = stats.get("hits", 0) / lookups if lookups else 0.0
+        families.setdefault("hit_ratio", []).append((cache_name, hit_ratio))
+
+    field_info = {suffix: (metric_type, help_text) for suffix, metric_type, help_text in CACHE_FIELDS.values()}
+    field_info["hit_ratio"] = ("gauge", "Fraction of lookups that were hits since startup.")
+
+    lines = []
+    for suffix, samples in families.items():
+        metric_type, help_text = field_info[suffix]
+        lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+        lines.append(f"# TYPE {prefix}_{suffix} {metric_type}")
+        for cache_name, value in samples:
+            lines.append(f'{prefix}_{suffix}{{cache="{cache_name}"}} {value!r}')
+    return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,181 @@
+"""
+Request Profiling Module
+
+This module profiles single requests of the MemeMind web app with cProfile,
+either on demand or for a sample of 1 in N requests, and writes each profile
+as a pstats file and as collapsed stacks ("frame;frame;frame microseconds"
+lines) that flamegraph.pl, speedscope or inferno can render directly.
+
+cProfile records caller -> callee edges rather than full stacks, so the
+collapsed stacks are rebuilt from those edges, splitting the time of a
+function called from several places in proportion to each caller's share.
+"""
+
+import cProfile
+import itertools
+import os
+import pstats
+import threading
+
+# Deepest stack written to the collapsed output
+MAX_STACK_DEPTH = 200
+
+# Paths taking less than this fraction of the profile are not expanded
+MIN_STACK_FRACTION = 0.0005
+
+class RequestProfiler:
+    """
+    Runs cProfile around one request at a time.
+
+    Only one request per process is profiled at once: overlapping requests
+    would show up in each other's profile on Python versions where cProfile
+    is process-wide, and are simply not profiled.
+    """
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def sample(self, every):
+        """
+        Decide whether the current request is one of the 1 in N sampled.
+
+        Args:
+            every (int): Sample 1 in this many requests; 0 never samples
+
+        Returns:
+            bool: True if this request should be profiled
+        """
+        return every > 0 and next(self._counter) % every == 0
+
+    def start(self):
+        """
+        Start profiling the current thread.
+
+        Returns:
+            cProfile.Profile: The running profile, or None if another
+                request (or another profiler) is already active
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool is active (Python 3.12+)
+            self._lock.release()
+            return None
+        return profile
+
+    def stop(self, profile):
+        """
+        Stop a profile started with start().
+
+        Args:
+            profile (cProfile.Profile): The running profile
+
+        Returns:
+            pstats.Stats: The collected statistics
+        """
+        try:
+            profile.disable()
+        finally:
+            self._lock.release()
+        return pstats.Stats(profile)
+
+def _frame_label(func):
+    """Format a pstats function key as a collapsed-stack frame."""
+    filename, lineno, name = func
+    if filename == "~":
+        label = name  # Built-ins, e.g. "<method 'sort' of 'list' objects>"
+    else:
+        relative = os.path.relpath(filename)
+        if relative.startswith(".."):
+            # Outside the project: keep the package path, e.g. PIL/Image.py
+            relative = os.path.join(*filename.split(os.sep)[-2:])
+        label = f"{name} ({relative}:{lineno})"
+    return label.replace(";", ",")
+
+def collapsed_stacks(stats, min_fraction=MIN_STACK_FRACTION):
+    """
+    Rebuild collapsed stacks from cProfile statistics.
+
+    Args:
+        stats (pstats.Stats): Profile statistics
+        min_fraction (float): Calls taking less than this fraction of the
+            total time are folded into their caller's frame
+
+    Returns:
+        list: "frame;frame;frame microseconds" lines, one per distinct stack
+    """
+    # Function -> (self time, total time) and function -> {callee: time spent in callee}
+    timings = {}
+    callees = {}
+    for func, (_, _, self_time, total_time, callers) in stats.stats.items():
+        timings[func] = (self_time, total_time)
+        for caller, (_, _, _, edge_time) in callers.items():
+            callees.setdefault(caller, {})[func] = edge_time
+
+    roots = [
+        func for func, (_, _, _, _, callers) in stats.stats.items()
+        if not any(caller in stats.stats for caller in callers)
+    ]
+
+    min_seconds = sum(timings[root][1] for root in roots) * min_fraction
+    totals = {}
+
+    def walk(func, stack, seconds, on_stack):
+        self_time, total_time = timings[func]
+        share = seconds / total_time if total_time else 0.0
+        stack = stack + (_frame_label(func),)
+        key = ";".join(stack)
+        totals[key] = totals.get(key, 0.0) + self_time * share
+
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            # Recursive calls are already counted in the outer frame
+            if callee not in timings or callee in on_stack:
+                continue
+
+            # Calls too short to show up are counted as the caller's own time
+            if edge_time * share < min_seconds:
+                totals[key] += edge_time * share
+                continue
+
+            on_stack.add(callee)
+            walk(callee, stack, edge_time * share, on_stack)
+            on_stack.discard(callee)
+
+    for root in roots:
+        walk(root, (), timings[root][1], {root})
+
+    return [
+        f"{stack} {round(seconds * 1e6)}"
+        for stack, seconds in sorted(totals.items())
+        if round(seconds * 1e6) > 0
+    ]
+
+def write_profile(stats, output_dir, name):
+    """
+    Save a profile as a pstats file and as collapsed stacks.
+
+    Args:
+        stats (pstats.Stats): Profile statistics
+        output_dir (str): Artifact directory, created if missing
+        name (str): File name without extension
+
+    Returns:
+        tuple: (pstats path, collapsed stacks path)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pstats_path = os.path.join(output_dir, f"{name}.pstats")
+    collapsed_path = os.path.join(output_dir, f"{name}.collapsed")
+
+    stats.dump_stats(pstats_path)
+    with open(collapsed_path, 'w') as f:
+        f.writelines(f"{line}\n" for line in collapsed_stacks(stats))
+
+    return pstats_path, collapsed_path
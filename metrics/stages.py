@@ -0,0 +1,313 @@
+"""
+Stage Metrics Module
+
+This module records how long each stage of the MemeMind pipeline takes
+(tokenization, VADER, template lookup, decoding, drawing, encoding, ...) into
+fixed-bucket histograms, and optionally into a per-request breakdown.
+"""
+
+import contextvars
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" values)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Stage name -> seconds, for the request being handled in this context
+_breakdown = contextvars.ContextVar("stage_breakdown", default=None)
+
+class Histogram:
+    """Fixed-bucket latency histogram. Not thread-safe; StageMetrics guards it."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets (tuple): Sorted bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        """Record one duration."""
+        self.observe_many((seconds,))
+
+    def observe_many(self, durations):
+        """
+        Record a batch of durations.
+
+        Args:
+            durations (list): Durations in seconds
+        """
+        buckets = self.buckets
+        counts = self.counts
+        for seconds in durations:
+            counts[bisect_left(buckets, seconds)] += 1
+        self.sum += sum(durations)
+        self.count += len(durations)
+
+    def snapshot(self):
+        """
+        Get a copy of the histogram.
+
+        Returns:
+            tuple: (cumulative counts per bucket including +Inf, sum, count)
+        """
+        cumulative = []
+        running = 0
+        for bucket_count in self.counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, self.sum, self.count
+
+class _StageTimer:
+    """Context manager timing one stage execution."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.name, perf_counter() - self.start)
+        return False
+
+class _NoopTimer:
+    """Stand-in timer used while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+class StageMetrics:
+    """
+    Registry of per-stage latency histograms.
+
+    Durations are recorded with stage(), a context manager for coarse stages,
+    or with lap(), which chains timestamps through a sequence of fine-grained
+    stages at the cost of one clock read each:
+
+        t = clock()
+        doc = tokenize(text)
+        t = stage_metrics.lap("nlp.tokenize", t)
+
+    Recording only appends to a buffer; durations are folded into the
+    histograms when they are read or the buffer fills up, which keeps the
+    hot path to a few hundred nanoseconds per stage.
+
+    While a breakdown is being collected in the current context (see
+    collect() and start_breakdown()), durations are also summed per stage for
+    that request. Work handed to other threads is only included if it runs
+    in a copy of the caller's context.
+    """
+
+    # Buffered durations folded into the histograms at once
+    FOLD_THRESHOLD = 4096
+
+    def __init__(self, buckets=STAGE_BUCKETS, enabled=True):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets (tuple): Bucket upper bounds for every stage histogram
+            enabled (bool): Whether stages are timed at all
+        """
+        self.buckets = buckets
+        self.enabled = enabled
+        self._histograms = {}
+        self._pending = {}  # Stage name -> durations not yet in its histogram
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """
+        Time a block of work as one execution of a stage.
+
+        Args:
+            name (str): Stage name, e.g. "meme.draw"
+
+        Returns:
+            A context manager
+        """
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _StageTimer(self, name)
+
+    def lap(self, name, start):
+        """
+        Record the time since start as one execution of a stage.
+
+        Args:
+            name (str): Stage name, e.g. "nlp.tokenize"
+            start (float): clock() reading taken when the stage began
+
+        Returns:
+            float: The current clock() reading, to start the next stage
+        """
+        now = perf_counter()
+        if self.enabled:
+            # Same as record(), inlined to keep the hot path short
+            seconds = now - start
+            pending = self._pending.get(name)
+            if pending is None:
+                pending = self._add_stage(name)
+            pending.append(seconds)
+            if len(pending) >= self.FOLD_THRESHOLD:
+                self._fold()
+
+            breakdown = _breakdown.get()
+            if breakdown is not None:
+                breakdown[name] = breakdown.get(name, 0.0) + seconds
+        return now
+
+    def record(self, name, seconds):
+        """
+        Record a stage duration measured by the caller.
+
+        Args:
+            name (str): Stage name
+            seconds (float): Duration
+        """
+        pending = self._pending.get(name)
+        if pending is None:
+            pending = self._add_stage(name)
+        pending.append(seconds)
+        if len(pending) >= self.FOLD_THRESHOLD:
+            self._fold()
+
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+    def _add_stage(self, name):
+        """Create the buffer and histogram of a stage seen for the first time."""
+        with self._lock:
+            if name not in self._pending:
+                self._histograms[name] = Histogram(self.buckets)
+                self._pending[name] = []
+            return self._pending[name]
+
+    def _fold(self):
+        """Move buffered durations into the histograms."""
+        with self._lock:
+            for name, pending in self._pending.items():
+                # Buffers are trimmed in place, so appends racing with the
+                # fold land after the taken slice and are kept for the next one
+                taken = len(pending)
+                if taken:
+                    self._histograms[name].observe_many(pending[:taken])
+                    del pending[:taken]
+
+    def start_breakdown(self):
+        """
+        Start collecting a per-stage breakdown in the current context.
+
+        Returns:
+            A token for stop_breakdown()
+        """
+        return _breakdown.set({})
+
+    def stop_breakdown(self, token):
+        """
+        Stop collecting the breakdown started with start_breakdown().
+
+        Args:
+            token: The token returned by start_breakdown()
+
+        Returns:
+            dict: Stage name -> total seconds spent in it
+        """
+        breakdown = _breakdown.get()
+        _breakdown.reset(token)
+        return breakdown or {}
+
+    def collect(self, func, *args, **kwargs):
+        """
+        Call a function and collect the stage breakdown of that call.
+
+        Returns:
+            tuple: (result, breakdown dict)
+        """
+        token = self.start_breakdown()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            breakdown = self.stop_breakdown(token)
+        return result, breakdown
+
+    def snapshot(self):
+        """
+        Get a copy of every stage histogram.
+
+        Returns:
+            dict: Stage name -> (cumulative bucket counts, sum, count)
+        """
+        self._fold()
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        """Drop all recorded durations."""
+        with self._lock:
+            self._pending.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self, metric_name="mememind_stage_seconds"):
+        """
+        Render the histograms in the Prometheus text exposition format.
+
+        Args:
+            metric_name (str): Name of the histogram metric
+
+        Returns:
+            str: The rendered metric family
+        """
+        lines = [
+            f"# HELP {metric_name} Time spent in each pipeline stage.",
+            f"# TYPE {metric_name} histogram"
+        ]
+        bounds = [repr(float(bucket)) for bucket in self.buckets] + ["+Inf"]
+        for name, (cumulative, total, count) in self.snapshot().items():
+            for bound, bucket_count in zip(bounds, cumulative):
+                lines.append(f'{metric_name}_bucket{{stage="{name}",le="{bound}"}} {bucket_count}')
+            lines.append(f'{metric_name}_sum{{stage="{name}"}} {total!r}')
+            lines.append(f'{metric_name}_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+def format_server_timing(breakdown):
+    """
+    Format a stage breakdown as a Server-Timing header value.
+
+    Args:
+        breakdown (dict): Stage name -> seconds
+
+    Returns:
+        str: e.g. "nlp.tokenize;dur=0.210, meme.draw;dur=3.104" (milliseconds)
+    """
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in breakdown.items())
+
+# Clock used for stage timings
+clock = perf_counter
+
+# Process-wide registry used by the nlp and meme packages
+stage_metrics = StageMetrics()
+
+def stage(name):
+    """Time a block of work with the process-wide registry (see StageMetrics.stage)."""
+    return stage_metrics.stage(name)
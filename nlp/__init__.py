@@ -5,8 +5,24 @@ This package provides text analysis functionalities for understanding input topi
 and generating appropriate meme content.
 """
 
-from .analyzer import NLPAnalyzer
-from .sentiment import EmotionDetector
-from .context import ContextAnalyzer
+import importlib
 
-__all__ = ['NLPAnalyzer', 'EmotionDetector', 'ContextAnalyzer'] 
\ No newline at end of file
+# Public name -> defining module. Modules are imported on first access, so
+# importing the package (e.g. for AnalysisCache) doesn't load NLTK or VADER.
+_EXPORTS = {
+    'NLPAnalyzer': '.analyzer',
+    'EmotionDetector': '.sentiment',
+    'ContextAnalyzer': '.context',
+    'AnalysisDocument': '.document',
+    'ParallelAnalyzer': '.parallel',
+    'AnalysisCache': '.cache'
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = ['NLPAnalyzer', 'EmotionDetector', 'ContextAnalyzer', 'AnalysisDocument', 'ParallelAnalyzer', 'AnalysisCache'] 
\ No newline at end of file
@@ -5,57 +5,132 @@ This module coordinates the NLP analysis of input text for the MemeMind applicat
 It integrates sentiment analysis, emotion detection, cultural context analysis, and tone detection.
 """
 
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from .sentiment import EmotionDetector
+import copy
+from .sentiment import EmotionDetector, get_sentiment_analyzer
 from .context import ContextAnalyzer
-
-# Download necessary NLTK resources
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+from .document import AnalysisDocument
+from .lexicon import KeywordIndex
+from .resources import ensure_nltk_resources, english_stopwords
+from metrics import clock, stage_metrics
 
 class NLPAnalyzer:
     """Main class for analyzing input text and extracting features for meme generation."""
     
-    def __init__(self):
-        """Initialize the NLP analyzer with necessary models and components."""
+    def __init__(self, cache=None):
+        """
+        Initialize the NLP analyzer with necessary models and components.
+        
+        Args:
+            cache (AnalysisCache, optional): Cache for analysis results keyed on normalized text
+        """
+        # Make sure the NLTK data is installed (probed once per process)
+        ensure_nltk_resources()
+        
         # SpaCy is temporarily disabled due to compatibility issues
         self.nlp = None
         print("Note: Using simplified NLP analysis due to spaCy compatibility issues")
             
-        # Initialize sentiment analyzer
-        self.sentiment_analyzer = SentimentIntensityAnalyzer()
+        # Use the process-wide sentiment analyzer
+        self.sentiment_analyzer = get_sentiment_analyzer()
         
         # Initialize simplified emotion detector and context analyzer
         self.emotion_detector = EmotionDetector()
         self.context_analyzer = ContextAnalyzer()
         
         # Load stopwords
-        self.stop_words = set(stopwords.words('english'))
+        self.stop_words = set(english_stopwords())
+        
+        # Formality markers
+        self.formal_markers = ["therefore", "however", "thus", "hence", "nevertheless", "furthermore", "moreover"]
+        self.informal_markers = ["lol", "haha", "yeah", "cool", "awesome", "btw", "gonna", "wanna"]
+        
+        # Precompile the markers for per-word lookups
+        self.formality_index = self._build_formality_index()
+        
+        # Optional result cache
+        self.cache = cache
     
-    def preprocess(self, text):
-        """Preprocess the input text for analysis."""
-        # Tokenize the text
-        tokens = word_tokenize(text.lower())
+    def _build_formality_index(self):
+        """Build the keyword index for the formality markers."""
+        return KeywordIndex({
+            "formal": self.formal_markers,
+            "informal": self.informal_markers
+        })
+    
+    def rebuild_lexicons(self):
+        """
+        Rebuild all keyword indexes after the keyword lists were edited.
         
-        # Remove stopwords and punctuation
-        tokens = [token for token in tokens if token.isalnum() and token not in self.stop_words]
+        Cached results were computed with the old lexicons, so the cache is cleared.
+        """
+        self.formality_index = self._build_formality_index()
+        self.emotion_detector.rebuild_index()
+        self.context_analyzer.rebuild_index()
+        
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def warm_up(self):
+        """
+        Load every lazily initialized resource (e.g. the punkt tokenizer) now.
+        
+        Call this before forking worker processes so the loaded models are
+        shared copy-on-write instead of being loaded again in every worker.
+        The result is not cached.
+        """
+        self._analyze("Warming up: this is great, lol. Thus the markets rallied!")
+    
+    def build_document(self, text):
+        """
+        Tokenize the input text once for all analysis stages.
+        
+        Args:
+            text (str): The input text to analyze
+            
+        Returns:
+            AnalysisDocument: The shared tokenized document
+        """
+        return AnalysisDocument(text, self.stop_words)
+    
+    def preprocess(self, text, doc=None):
+        """Preprocess the input text for analysis."""
+        # Reuse the shared document's tokens when available
+        if doc is None:
+            doc = self.build_document(text)
         
-        # Return preprocessed text
-        return " ".join(tokens)
+        # Return the content tokens (stopwords and punctuation removed)
+        return " ".join(doc.content_tokens)
     
     def analyze(self, text):
         """
         Analyze input text and return a comprehensive analysis.
         
+        Results are served from the cache, when one is configured, for texts
+        that only differ in whitespace from a previously analyzed text.
+        
+        Args:
+            text (str): The input text to analyze
+            
+        Returns:
+            dict: A dictionary containing the analysis results
+        """
+        if self.cache is None:
+            return self._analyze(text)
+        
+        key = self.cache.normalize(text)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._analyze(text)
+            self.cache.put(key, result)
+        else:
+            result["original_text"] = text
+        
+        return result
+    
+    def _analyze(self, text):
+        """
+        Run the full analysis pipeline on the input text.
+        
         Args:
             text (str): The input text to analyze
             
@@ -73,20 +148,14 @@ class NLPAnalyzer:
             "formality": ""
         }
         
-        # Preprocess text
-        preprocessed_text = self.preprocess(text)
-        
-        # Simple entity extraction without spaCy (just look for capitalized words)
-        words = text.split()
-        entities = []
-        for word in words:
-            if word[0].isupper() and len(word) > 1 and word.lower() not in self.stop_words:
-                entities.append({"text": word, "label": "ENTITY"})
-        
-        result["entities"] = entities
+        # Tokenize once and share the document across all stages
+        started = clock()
+        doc = self.build_document(text)
+        started = stage_metrics.lap("nlp.tokenize", started)
         
         # Get VADER sentiment
         vader_sentiment = self.sentiment_analyzer.polarity_scores(text)
+        stage_metrics.lap("nlp.vader", started)
         result["sentiment"]["vader"] = {
             "compound": vader_sentiment["compound"],
             "positive": vader_sentiment["pos"],
@@ -110,38 +179,111 @@ class NLPAnalyzer:
             "score": score
         }
         
-        # Get emotions from simplified emotion detector
-        result["emotions"] = self.emotion_detector.detect_emotions(text)
+        # Get emotions, reusing the VADER scores computed above
+        result["emotions"] = self.emotion_detector.detect_emotions(text, doc=doc, sentiment=vader_sentiment)
+        
+        # Simple entity extraction without spaCy (just look for capitalized words)
+        started = clock()
+        result["entities"] = self._extract_entities(doc)
         
         # Analyze context and topics with simplified approach
-        # Just extract common nouns as topics
-        topics = []
-        for word in text.split():
-            word = word.lower()
-            if len(word) > 3 and word not in self.stop_words:
-                if word not in [t.lower() for t in topics]:
-                    topics.append(word)
-        
-        if len(topics) > 3:
-            topics = topics[:3]  # Limit to 3 topics
-            
-        result["topics"] = topics
+        result["topics"] = self._extract_topics(doc)
         
         # Determine formality (simplified)
-        words = text.lower().split()
-        formal_markers = ["therefore", "however", "thus", "hence", "nevertheless", "furthermore", "moreover"]
-        informal_markers = ["lol", "haha", "yeah", "cool", "awesome", "btw", "gonna", "wanna"]
-        
-        formal_count = sum(1 for w in words if w in formal_markers)
-        informal_count = sum(1 for w in words if w in informal_markers)
-        
-        result["formality"] = "formal" if formal_count > informal_count else "informal"
+        result["formality"] = self._detect_formality(doc)
         
         # Determine overall tone based on combined factors
         result["tone"] = self._determine_tone(result)
+        stage_metrics.lap("nlp.context", started)
         
         return result
     
+    def analyze_many(self, texts, workers=None):
+        """
+        Analyze a batch of input texts.
+        
+        Each text still goes through analyze() on its own; nothing is
+        tokenized or scored across texts. The batch saves one request per
+        text, analyzes repeated texts only once, and with workers > 1 spreads
+        the texts over processes.
+        
+        Args:
+            texts (list): The input texts to analyze
+            workers (int, optional): Number of worker processes; more than one
+                spreads the batch over a process pool (see ParallelAnalyzer)
+            
+        Returns:
+            list: Analysis result dictionaries, in the same order as the input
+        """
+        if workers is not None and workers > 1:
+            from .parallel import ParallelAnalyzer
+            with ParallelAnalyzer(workers=workers) as parallel_analyzer:
+                return parallel_analyzer.analyze_many(texts)
+        
+        results = []
+        analyzed = {}
+        
+        for text in texts:
+            if text in analyzed:
+                # Give each position its own copy so callers can mutate results safely
+                results.append(copy.deepcopy(analyzed[text]))
+            else:
+                analyzed[text] = self.analyze(text)
+                results.append(analyzed[text])
+        
+        return results
+    
+    def _extract_entities(self, doc):
+        """
+        Extract capitalized words as entities.
+        
+        Args:
+            doc (AnalysisDocument): The shared tokenized document
+            
+        Returns:
+            list: Entities as dicts with text and label
+        """
+        entities = []
+        for word in doc.words:
+            if word[0].isupper() and len(word) > 1 and word.lower() not in self.stop_words:
+                entities.append({"text": word, "label": "ENTITY"})
+        
+        return entities
+    
+    def _extract_topics(self, doc):
+        """
+        Extract the first few non-stopword words as topics.
+        
+        Args:
+            doc (AnalysisDocument): The shared tokenized document
+            
+        Returns:
+            list: Up to 3 topics
+        """
+        # Just extract common nouns as topics
+        topics = []
+        for word in doc.lower_words:
+            if len(word) > 3 and word not in self.stop_words and word not in topics:
+                topics.append(word)
+                if len(topics) == 3:
+                    break  # Limit to 3 topics
+        
+        return topics
+    
+    def _detect_formality(self, doc):
+        """
+        Classify the text as formal or informal from marker words.
+        
+        Args:
+            doc (AnalysisDocument): The shared tokenized document
+            
+        Returns:
+            str: "formal" or "informal"
+        """
+        marker_counts = self.formality_index.count(doc.lower_words)
+        
+        return "formal" if marker_counts["formal"] > marker_counts["informal"] else "informal"
+    
     def _determine_tone(self, analysis_result):
         """
         Determine the overall tone of the text based on combined analysis factors.
@@ -0,0 +1,167 @@
+"""
+Analysis Cache Module
+
+This module provides a bounded LRU cache for NLP analysis results in the
+MemeMind application, so repeated inputs skip the full analysis.
+"""
+
+import copy
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+def _estimate_size(value):
+    """
+    Roughly estimate the memory used by a JSON-like value.
+
+    Args:
+        value: A dict, list, tuple, string or scalar
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+class AnalysisCache:
+    """
+    Thread-safe LRU cache with optional time-to-live and memory budget.
+
+    Entries are keyed on normalized text. Values are copied on the way in and
+    out, so callers can freely modify the results they get back.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached results
+            max_bytes (int, optional): Approximate memory budget for cached results
+            ttl (float, optional): Seconds after which an entry expires
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # key -> (value, size, stored_at), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize(text):
+        """
+        Normalize text into a cache key.
+
+        Only whitespace is normalized, since case and punctuation affect
+        entities, sentiment and tone.
+
+        Args:
+            text (str): The input text
+
+        Returns:
+            str: The cache key
+        """
+        return " ".join(text.split())
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): The normalized text
+
+        Returns:
+            A copy of the cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        """
+        Store a value, evicting least recently used entries if over budget.
+
+        Args:
+            key (str): The normalized text
+            value: The value to cache (copied)
+        """
+        value = copy.deepcopy(value)
+        size = _estimate_size(value)
+
+        # Values larger than the whole budget are never cached
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Remove an entry; the caller must hold the lock."""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Remove all entries, e.g. after the lexicons change."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Get cache usage statistics.
+
+        Returns:
+            dict: Entry count, approximate bytes, hits, misses, evictions,
+                expirations and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -4,27 +4,21 @@ Context Analyzer Module
 This module analyzes the cultural and contextual aspects of text for the MemeMind application.
 """
 
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-
-# Download necessary NLTK resources
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+from .document import AnalysisDocument
+from .lexicon import KeywordIndex
+from .resources import ensure_nltk_resources, english_stopwords
+from metrics import clock, stage_metrics
 
 class ContextAnalyzer:
     """Analyzes cultural context and topics in text."""
     
     def __init__(self):
         """Initialize the context analyzer."""
+        # Make sure the NLTK data is installed (probed once per process)
+        ensure_nltk_resources()
+        
         # Load stopwords
-        self.stop_words = set(stopwords.words('english'))
+        self.stop_words = set(english_stopwords())
         
         # Simplified topic detection
         self.topic_keywords = {
@@ -51,6 +45,17 @@ class ContextAnalyzer:
             "kinda", "sorta", "yep", "nope", "dude", "like", "totally", "stuff",
             "u", "ur", "r", "y", "k", "omg", "wtf", "idk", "tbh", "imo"
         ]
+        
+        # Precompile keyword and marker lists into inverted indexes
+        self.rebuild_index()
+    
+    def rebuild_index(self):
+        """Rebuild the keyword indexes after the keyword or marker lists were edited."""
+        self.topic_index = KeywordIndex(self.topic_keywords)
+        self.formality_index = KeywordIndex({
+            "formal": self.formal_markers,
+            "informal": self.informal_markers
+        })
     
     def analyze(self, text, doc=None):
         """
@@ -58,22 +63,23 @@ class ContextAnalyzer:
         
         Args:
             text (str): The text to analyze
-            doc: Optional pre-processed spaCy doc (not used in the simplified version)
+            doc (AnalysisDocument, optional): Pre-tokenized document shared with other stages
             
         Returns:
             dict: Analysis results including topics and formality
         """
-        # Tokenize text
-        tokens = word_tokenize(text.lower())
+        # Tokenize text once, unless the caller already did
+        started = clock()
+        if doc is None:
+            doc = AnalysisDocument(text, self.stop_words)
+            started = stage_metrics.lap("nlp.tokenize", started)
         
-        # Remove stopwords
-        filtered_tokens = [word for word in tokens if word.isalnum() and word not in self.stop_words]
-        
-        # Detect topics
-        topics = self._detect_topics(filtered_tokens)
+        # Detect topics from tokens without stopwords
+        topics = self._detect_topics(doc.content_tokens)
         
         # Detect formality
-        is_formal = self._detect_formality(tokens)
+        is_formal = self._detect_formality(doc.tokens, doc.average_sentence_length())
+        stage_metrics.lap("nlp.context", started)
         
         return {
             "topics": topics,
@@ -91,12 +97,7 @@ class ContextAnalyzer:
             list: Detected topics
         """
         # Count occurrences of topic keywords
-        topic_counts = {topic: 0 for topic in self.topic_keywords}
-        
-        for token in tokens:
-            for topic, keywords in self.topic_keywords.items():
-                if token in keywords:
-                    topic_counts[topic] += 1
+        topic_counts = self.topic_index.count(tokens)
         
         # Get the top topics (those with at least one keyword)
         topics = [topic for topic, count in topic_counts.items() if count > 0]
@@ -108,23 +109,21 @@ class ContextAnalyzer:
         
         return topics[:3]  # Return top 3 topics max
     
-    def _detect_formality(self, tokens):
+    def _detect_formality(self, tokens, avg_sentence_length):
         """
         Detect the formality level of the text.
         
         Args:
             tokens (list): List of tokens to analyze
+            avg_sentence_length (float): Average number of tokens per sentence
             
         Returns:
             bool: True if formal, False if informal
         """
         # Count formal and informal markers
-        formal_count = sum(1 for token in tokens if token.lower() in self.formal_markers)
-        informal_count = sum(1 for token in tokens if token.lower() in self.informal_markers)
-        
-        # Consider sentence structure
-        sentences = nltk.sent_tokenize(" ".join(tokens))
-        avg_sentence_length = sum(len(nltk.word_tokenize(sentence)) for sentence in sentences) / len(sentences) if sentences else 0
+        marker_counts = self.formality_index.count(tokens)
+        formal_count = marker_counts["formal"]
+        informal_count = marker_counts["informal"]
         
         # Weighted decision - formality is influenced by:
         # 1. Presence of formal markers
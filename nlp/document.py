@@ -0,0 +1,52 @@
+"""
+Analysis Document Module
+
+This module provides the shared, pre-tokenized view of an input text that is
+passed between the analysis stages of the MemeMind application.
+"""
+
+from nltk.tokenize import word_tokenize
+from .resources import sentence_tokenizer
+
+class AnalysisDocument:
+    """
+    Tokenized representation of a text, built once per analysis.
+
+    Every stage (emotions, context, formality, entities, topics) reads its
+    tokens from this object instead of re-tokenizing the raw text.
+    """
+
+    def __init__(self, text, stop_words=frozenset()):
+        """
+        Tokenize and normalize the text.
+
+        Args:
+            text (str): The text to analyze
+            stop_words (set, optional): Stopwords excluded from content tokens
+        """
+        self.text = text
+        self.lower_text = text.lower()
+
+        # Whitespace-separated words, as typed and lowercased
+        self.words = text.split()
+        self.lower_words = self.lower_text.split()
+
+        # Sentence split once; word_tokenize splits sentences the same way
+        # internally, so per-sentence tokens concatenate to the full token list
+        self.sentences = sentence_tokenizer().tokenize(self.lower_text)
+        self.sentence_tokens = [word_tokenize(sentence, preserve_line=True) for sentence in self.sentences]
+        self.tokens = [token for sentence in self.sentence_tokens for token in sentence]
+
+        # Alphanumeric tokens that are not stopwords
+        self.content_tokens = [token for token in self.tokens if token.isalnum() and token not in stop_words]
+
+    def average_sentence_length(self):
+        """
+        Get the average number of tokens per sentence.
+
+        Returns:
+            float: Average sentence length, or 0 if the text has no sentences
+        """
+        if not self.sentences:
+            return 0
+        return len(self.tokens) / len(self.sentences)
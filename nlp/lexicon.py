@@ -0,0 +1,95 @@
+"""
+Keyword Lexicon Module
+
+This module provides the precompiled keyword index used by the MemeMind
+emotion, topic and formality detectors.
+"""
+
+from types import MappingProxyType
+
+class KeywordIndex:
+    """
+    Inverted index from keywords to the categories that list them.
+
+    Single-word keywords are resolved with one dictionary lookup per token.
+    Multi-word phrases (e.g. "mind blown") are indexed by their first word and
+    only compared against the following tokens when that word occurs.
+    """
+
+    def __init__(self, keywords_by_category):
+        """
+        Build the index from a keyword dictionary.
+
+        Args:
+            keywords_by_category (dict): Mapping of category name to a list of keywords
+        """
+        # Keep category order so callers see counts in a stable order
+        self.categories = tuple(keywords_by_category)
+
+        words = {}
+        phrases = {}
+        for category, keywords in keywords_by_category.items():
+            for keyword in keywords:
+                parts = tuple(keyword.lower().split())
+                if not parts:
+                    continue
+                if len(parts) == 1:
+                    matches = words.setdefault(parts[0], [])
+                else:
+                    matches = phrases.setdefault(parts[0], {}).setdefault(parts, [])
+                if category not in matches:
+                    matches.append(category)
+
+        # Freeze the index; it is shared read-only by every lookup
+        self._words = MappingProxyType({word: tuple(categories) for word, categories in words.items()})
+        self._phrases = MappingProxyType({
+            first: tuple((phrase, tuple(categories)) for phrase, categories in entries.items())
+            for first, entries in phrases.items()
+        })
+
+    def __len__(self):
+        """Return the number of indexed keywords and phrases."""
+        return len(self._words) + sum(len(entries) for entries in self._phrases.values())
+
+    def __contains__(self, token):
+        """Check whether a single token is an indexed keyword."""
+        return token in self._words
+
+    def lookup(self, token):
+        """
+        Get the categories listing a single token.
+
+        Args:
+            token (str): Lowercased token
+
+        Returns:
+            tuple: Category names, empty if the token is not a keyword
+        """
+        return self._words.get(token, ())
+
+    def count(self, tokens):
+        """
+        Count keyword and phrase occurrences per category.
+
+        Args:
+            tokens (list): Lowercased tokens to scan
+
+        Returns:
+            dict: Occurrence count for every category, in index order
+        """
+        counts = {category: 0 for category in self.categories}
+        words = self._words
+        phrases = self._phrases
+
+        for position, token in enumerate(tokens):
+            for category in words.get(token, ()):
+                counts[category] += 1
+
+            # Only tokens that start a phrase pay for a phrase comparison
+            if token in phrases:
+                for phrase, categories in phrases[token]:
+                    if tuple(tokens[position:position + len(phrase)]) == phrase:
+                        for category in categories:
+                            counts[category] += 1
+
+        return counts
@@ -0,0 +1,120 @@
+"""
+Parallel Analysis Module
+
+This module fans batch text analysis out to a pool of worker processes for the
+MemeMind application. Analysis is pure-Python CPU work, so processes (not
+threads) are needed to use more than one core.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Analyzer owned by the current worker process
+_worker_analyzer = None
+
+def _init_worker():
+    """Build one NLPAnalyzer per worker process."""
+    global _worker_analyzer
+    from .analyzer import NLPAnalyzer
+    _worker_analyzer = NLPAnalyzer()
+
+def _analyze_chunk(texts):
+    """
+    Analyze a chunk of texts inside a worker process.
+
+    Args:
+        texts (list): The texts to analyze
+
+    Returns:
+        list: Analysis results, in the same order as the chunk
+    """
+    return _worker_analyzer.analyze_many(texts)
+
+class ParallelAnalyzer:
+    """
+    Analyzes batches of text across a process pool.
+
+    Each worker builds its own NLPAnalyzer once, so models and lexicons are
+    loaded per worker rather than per chunk. Can be used as a context manager
+    to shut the pool down when done.
+    """
+
+    def __init__(self, workers=None, chunk_size=64):
+        """
+        Initialize the parallel analyzer.
+
+        Args:
+            workers (int, optional): Number of worker processes (defaults to the CPU count)
+            chunk_size (int): Number of texts sent to a worker at a time
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None
+
+    def _get_executor(self):
+        """Start the process pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._executor
+
+    def _chunks(self, texts):
+        """Split an iterable of texts into lists of chunk_size texts."""
+        iterator = iter(texts)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def iter_analyze(self, texts):
+        """
+        Analyze texts in parallel, yielding results as they become available.
+
+        Results are yielded in input order. Only a bounded number of chunks
+        are in flight at once, so texts may be a lazy iterable of any length.
+
+        Args:
+            texts (iterable): The input texts to analyze
+
+        Yields:
+            dict: Analysis result for each text, in input order
+        """
+        executor = self._get_executor()
+        pending = deque()
+        max_pending = self.workers * 2
+
+        for chunk in self._chunks(texts):
+            pending.append(executor.submit(_analyze_chunk, chunk))
+
+            # Drain the oldest chunk once the window is full
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+    def analyze_many(self, texts):
+        """
+        Analyze a batch of texts in parallel.
+
+        Args:
+            texts (iterable): The input texts to analyze
+
+        Returns:
+            list: Analysis result dictionaries, in the same order as the input
+        """
+        return list(self.iter_analyze(texts))
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
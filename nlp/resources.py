@@ -0,0 +1,309 @@
+"""
+NLP Resources Module
+
+This module provides the language resources used by the MemeMind analyzers:
+the punkt sentence tokenizer, English stopwords and the VADER lexicons.
+
+They are read from an offline resource bundle when one is configured (with
+configure() or the MEMEMIND_NLP_BUNDLE environment variable). Otherwise they
+come from the installed NLTK data, which is probed once per process and
+downloaded on a miss unless downloads are disabled.
+
+Build and check a bundle with:
+    python -m nlp.resources build nlp_resources-v1.pickle
+    python -m nlp.resources check nlp_resources-v1.pickle
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import threading
+
+# Environment variable naming the resource bundle to load
+BUNDLE_ENV = "MEMEMIND_NLP_BUNDLE"
+
+# Bumped whenever the bundle layout changes; older bundles are rejected
+BUNDLE_VERSION = 1
+
+# Resource name -> NLTK data path
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords"
+}
+
+# Resources already found (or downloaded) in this process
+_available = set()
+_lock = threading.Lock()
+
+# Configuration, see configure()
+_bundle_path = os.environ.get(BUNDLE_ENV) or None
+_allow_download = True
+
+# Loaded once per process
+_bundle = None
+_stop_words = None
+_sentence_tokenizer = None
+
+def configure(bundle_path=None, allow_download=True):
+    """
+    Choose where the NLP resources are loaded from.
+
+    Call this before the first analyzer is created; resources that were
+    already loaded are dropped.
+
+    Args:
+        bundle_path (str, optional): Resource bundle to load everything from
+        allow_download (bool): Download missing NLTK data when no bundle is
+            configured; when False, a missing resource raises LookupError
+    """
+    global _bundle_path, _allow_download, _bundle, _stop_words, _sentence_tokenizer
+    with _lock:
+        _bundle_path = bundle_path
+        _allow_download = allow_download
+        _bundle = None
+        _stop_words = None
+        _sentence_tokenizer = None
+
+def _punkt_resource():
+    """Get the NLTK resource holding the punkt model used by this NLTK version."""
+    from nltk.tokenize import punkt
+    return "punkt_tab" if hasattr(punkt, "PunktTokenizer") else "punkt"
+
+def _load_nltk_punkt():
+    """Load the English punkt tokenizer the same way nltk.sent_tokenize does."""
+    from nltk.tokenize import punkt
+    if hasattr(punkt, "PunktTokenizer"):
+        return punkt.PunktTokenizer("english")
+
+    import nltk
+    return nltk.data.load("tokenizers/punkt/english.pickle")
+
+def load_bundle(path):
+    """
+    Load and validate a resource bundle.
+
+    Bundles are pickles, so only load bundles you built yourself.
+
+    Args:
+        path (str): Path to the bundle
+
+    Returns:
+        dict: The bundle contents
+
+    Raises:
+        LookupError: If the bundle is missing, unreadable or of another version
+    """
+    try:
+        with open(path, 'rb') as f:
+            bundle = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        raise LookupError(f"Cannot load NLP resource bundle {path}: {e}") from e
+
+    if not isinstance(bundle, dict) or bundle.get("version") != BUNDLE_VERSION:
+        found = bundle.get("version") if isinstance(bundle, dict) else None
+        raise LookupError(
+            f"NLP resource bundle {path} has version {found}, expected {BUNDLE_VERSION}; "
+            f"rebuild it with: python -m nlp.resources build {path}"
+        )
+
+    missing = {"punkt", "stopwords", "vader_lexicon", "vader_emojis"} - set(bundle)
+    if missing:
+        raise LookupError(f"NLP resource bundle {path} is missing: {', '.join(sorted(missing))}")
+
+    return bundle
+
+def get_bundle():
+    """
+    Get the configured resource bundle, loading it on first use.
+
+    Returns:
+        dict: The bundle contents, or None if no bundle is configured
+
+    Raises:
+        LookupError: If the configured bundle cannot be loaded
+    """
+    global _bundle
+    if _bundle is None and _bundle_path is not None:
+        with _lock:
+            if _bundle is None:
+                _bundle = load_bundle(_bundle_path)
+    return _bundle
+
+def build_bundle(path):
+    """
+    Pack the installed punkt model, stopwords and VADER lexicons into a bundle.
+
+    The NLTK data must already be installed (e.g. with app.py --setup).
+
+    Args:
+        path (str): Where to write the bundle
+    """
+    import nltk
+    import vaderSentiment
+    from nltk.corpus import stopwords
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    vader = SentimentIntensityAnalyzer()
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "nltk_version": nltk.__version__,
+        "vader_version": getattr(vaderSentiment, "__version__", None),
+        "punkt": _load_nltk_punkt()._params,
+        "stopwords": stopwords.words('english'),
+        "vader_lexicon": vader.lexicon,
+        "vader_emojis": vader.emojis
+    }
+
+    # Write to a temporary file first so readers never see a partial bundle
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+def check_resources(bundle_path=None):
+    """
+    Check that every NLP resource can be loaded, without downloading anything.
+
+    Args:
+        bundle_path (str, optional): Bundle to check; defaults to the
+            configured bundle, or the installed NLTK data if there is none
+
+    Returns:
+        list: Problems found; empty if everything is available
+    """
+    bundle_path = bundle_path or _bundle_path
+    if bundle_path is not None:
+        try:
+            load_bundle(bundle_path)
+        except LookupError as e:
+            return [str(e)]
+        return []
+
+    import nltk
+
+    problems = []
+    for name in (_punkt_resource(), "stopwords"):
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            problems.append(f"NLTK resource '{name}' is not installed")
+    return problems
+
+def ensure_nltk_resources(names=None):
+    """
+    Make sure NLTK resources are installed, downloading any that are missing.
+
+    Each resource is only probed the first time it is requested. Nothing is
+    probed when a resource bundle is configured.
+
+    Args:
+        names (iterable, optional): Resource names from NLTK_RESOURCES;
+            defaults to the punkt model and stopwords
+
+    Raises:
+        LookupError: If a resource is missing and downloads are disabled
+    """
+    if _bundle_path is not None:
+        return
+
+    if names is None:
+        names = (_punkt_resource(), "stopwords")
+
+    missing = [name for name in names if name not in _available]
+    if not missing:
+        return
+
+    import nltk
+
+    with _lock:
+        for name in missing:
+            if name in _available:
+                continue
+            try:
+                nltk.data.find(NLTK_RESOURCES[name])
+            except LookupError:
+                if not _allow_download:
+                    raise LookupError(
+                        f"NLTK resource '{name}' is not installed and downloads are disabled; "
+                        f"configure a resource bundle (see python -m nlp.resources)"
+                    )
+                nltk.download(name)
+            _available.add(name)
+
+def english_stopwords():
+    """
+    Get the English stopword list.
+
+    Returns:
+        frozenset: The English stopwords
+    """
+    global _stop_words
+    if _stop_words is None:
+        bundle = get_bundle()
+        if bundle is not None:
+            words = bundle["stopwords"]
+        else:
+            ensure_nltk_resources(("stopwords",))
+            from nltk.corpus import stopwords
+            words = stopwords.words('english')
+        _stop_words = frozenset(words)
+    return _stop_words
+
+def sentence_tokenizer():
+    """
+    Get the English punkt sentence tokenizer.
+
+    Returns:
+        PunktSentenceTokenizer: Splits text like nltk.sent_tokenize
+    """
+    global _sentence_tokenizer
+    if _sentence_tokenizer is None:
+        bundle = get_bundle()
+        if bundle is not None:
+            from nltk.tokenize.punkt import PunktSentenceTokenizer
+            tokenizer = PunktSentenceTokenizer()
+            tokenizer._params = bundle["punkt"]
+        else:
+            ensure_nltk_resources((_punkt_resource(),))
+            tokenizer = _load_nltk_punkt()
+        _sentence_tokenizer = tokenizer
+    return _sentence_tokenizer
+
+def vader_lexicons():
+    """
+    Get the bundled VADER lexicons.
+
+    Returns:
+        tuple: (lexicon, emojis) dicts, or None if no bundle is configured
+    """
+    bundle = get_bundle()
+    if bundle is None:
+        return None
+    return bundle["vader_lexicon"], bundle["vader_emojis"]
+
+def main(argv=None):
+    """Command-line entry point to build or check a resource bundle."""
+    parser = argparse.ArgumentParser(description="Build or check the offline NLP resource bundle.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Pack the installed NLTK data and VADER lexicons")
+    build.add_argument("path", help="Where to write the bundle")
+    check = subparsers.add_parser("check", help="Check that all resources load, without downloading")
+    check.add_argument("path", nargs="?", help=f"Bundle to check (default: ${BUNDLE_ENV} or the installed NLTK data)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_bundle(args.path)
+        print(f"Wrote NLP resource bundle v{BUNDLE_VERSION} to {args.path}")
+        return 0
+
+    problems = check_resources(args.path)
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print("All NLP resources are available")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,32 @@ This module handles sentiment and emotion detection for the MemeMind application
 
 from nltk.tokenize import word_tokenize
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from .lexicon import KeywordIndex
+from .resources import vader_lexicons
+from metrics import clock, stage_metrics
+
+# Process-wide VADER instance shared by every analysis component
+_sentiment_analyzer = None
+
+def get_sentiment_analyzer():
+    """
+    Get the shared VADER sentiment analyzer, creating it on first use.
+    
+    Returns:
+        SentimentIntensityAnalyzer: The process-wide analyzer instance
+    """
+    global _sentiment_analyzer
+    if _sentiment_analyzer is None:
+        lexicons = vader_lexicons()
+        if lexicons is None:
+            _sentiment_analyzer = SentimentIntensityAnalyzer()
+        else:
+            # Use the pre-parsed lexicons from the resource bundle instead of
+            # reading and parsing the lexicon files
+            analyzer = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+            analyzer.lexicon, analyzer.emojis = lexicons
+            _sentiment_analyzer = analyzer
+    return _sentiment_analyzer
 
 class EmotionDetector:
     """
@@ -14,8 +40,8 @@ class EmotionDetector:
     
     def __init__(self):
         """Initialize the emotion detector with emotion keyword dictionaries."""
-        # Initialize the sentiment analyzer for supporting emotion detection
-        self.sentiment_analyzer = SentimentIntensityAnalyzer()
+        # Use the shared sentiment analyzer for supporting emotion detection
+        self.sentiment_analyzer = get_sentiment_analyzer()
         
         # Emotion keyword dictionaries
         self.emotion_keywords = {
@@ -54,30 +80,56 @@ class EmotionDetector:
                 "ambiguous", "unclear", "bewildered", "bemused", "dumbfounded", "stumped", "lost"
             ]
         }
+        
+        # Precompile the keywords into an inverted index for per-token lookups
+        self.keyword_index = KeywordIndex(self.emotion_keywords)
+    
+    def rebuild_index(self):
+        """Rebuild the keyword index after emotion_keywords was edited."""
+        self.keyword_index = KeywordIndex(self.emotion_keywords)
     
-    def detect_emotions(self, text):
+    def detect_emotions(self, text, doc=None, sentiment=None):
         """
         Detect emotions in the given text using keyword matching.
         
         Args:
             text (str): The text to analyze
+            doc (AnalysisDocument, optional): Pre-tokenized document shared with other stages
+            sentiment (dict, optional): VADER polarity scores already computed for the text
             
         Returns:
             list: List of detected emotions with scores, sorted by score
         """
-        # Tokenize text
-        tokens = word_tokenize(text.lower())
+        # Tokenize text, unless the caller already did
+        started = clock()
+        if doc is not None:
+            tokens = doc.tokens
+        else:
+            tokens = word_tokenize(text.lower())
+            started = stage_metrics.lap("nlp.tokenize", started)
         
-        # Count emotion keywords
-        emotion_counts = {emotion: 0 for emotion in self.emotion_keywords}
+        # Get sentiment to help with emotion detection, unless the caller already scored it
+        if sentiment is None:
+            sentiment = self.sentiment_analyzer.polarity_scores(text)
+            started = stage_metrics.lap("nlp.vader", started)
         
-        for token in tokens:
-            for emotion, keywords in self.emotion_keywords.items():
-                if token in keywords:
-                    emotion_counts[emotion] += 1
+        emotions = self._score_emotions(tokens, sentiment)
+        stage_metrics.lap("nlp.emotions", started)
+        return emotions
+    
+    def _score_emotions(self, tokens, sentiment):
+        """
+        Score emotions from keyword matches and VADER polarity.
         
-        # Get sentiment to help with emotion detection
-        sentiment = self.sentiment_analyzer.polarity_scores(text)
+        Args:
+            tokens (list): Lowercased tokens of the text
+            sentiment (dict): VADER polarity scores of the text
+            
+        Returns:
+            list: List of detected emotions with scores, sorted by score
+        """
+        # Count emotion keywords and phrases
+        emotion_counts = self.keyword_index.count(tokens)
         
         # Adjust emotion scores based on sentiment
         if sentiment["compound"] > 0.3:
@@ -4,25 +4,211 @@ MemeMind Web Interface Module
 This module provides a Flask web interface for the MemeMind meme generator.
 """
 
+import base64
+import io
 import os
+import threading
+import time
 import uuid
-from flask import Flask, request, render_template, url_for, jsonify, send_from_directory
+from concurrent.futures import ThreadPoolExecutor
+import json
+from flask import Flask, Response, g, request, render_template, url_for, jsonify, send_from_directory, send_file, stream_with_context
 from werkzeug.utils import secure_filename
 
-from nlp.analyzer import NLPAnalyzer
-from meme.generator import MemeGenerator
+from nlp import resources
+from nlp.cache import AnalysisCache
+from meme.generator import MemeGenerator, FORMAT_EXTENSIONS, FORMAT_MIME_TYPES
+from meme.cache import RenderCache
+from metrics import stage_metrics, format_server_timing, render_cache_metrics, RequestProfiler, write_profile
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), '../meme/output')
+app.config['TEMPLATES_DIR'] = 'meme/templates'  # Meme templates and mappings.json
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
+app.config['MAX_BATCH_SIZE'] = 1000  # Max texts per batch analysis request
+app.config['MAX_MEME_BATCH_SIZE'] = 500  # Max memes per batch generation request
+app.config['ANALYSIS_CACHE_SIZE'] = 4096  # Max cached analysis results (0 disables the cache)
+app.config['ANALYSIS_CACHE_MAX_BYTES'] = 64 * 1024 * 1024  # Approximate cache memory budget
+app.config['ANALYSIS_CACHE_TTL'] = 3600  # Seconds before a cached result expires
+app.config['TEMPLATE_WATCH_INTERVAL'] = 10  # Seconds between template directory scans (0 disables)
+app.config['MEME_RESPONSE_MODE'] = 'url'  # Default meme response: 'url', 'base64' or 'image'
+app.config['DETERMINISTIC_MEMES'] = False  # Seeded template choice + content-addressed render cache
+app.config['RENDER_CACHE_MAX_BYTES'] = 512 * 1024 * 1024  # Disk budget for cached renders
+app.config['MEME_ENCODE_OPTIONS'] = {}  # Overrides for meme.generator.ENCODE_DEFAULTS (format, quality, ...)
+app.config['THUMBNAIL_SIZE'] = (320, 320)  # Max thumbnail size when a request asks for 'thumbnail'
+app.config['NLP_RESOURCE_BUNDLE'] = os.environ.get(resources.BUNDLE_ENV)  # Offline bundle built with `python -m nlp.resources build`
+app.config['NLP_ALLOW_DOWNLOAD'] = True  # Download missing NLTK data when no bundle is configured
+app.config['CAPTIONS_PATH'] = os.path.join(os.path.dirname(__file__), '../meme_captions.csv')  # Captions CSV or index built with `python -m meme.captions build`
+app.config['CAPTION_SUGGESTIONS'] = 0  # Curated captions suggested with each generated meme (0 disables; meme_captions.csv has only ~30 real captions)
+app.config['METRICS_ENABLED'] = True  # Time pipeline stages and expose them at /metrics
+app.config['STAGE_TIMING_HEADER'] = False  # Add each request's stage breakdown as a Server-Timing header (exposes internals to clients)
+app.config['PROFILING_ENABLED'] = False  # Profile requests sent with an X-Profile header or ?profile= query flag
+app.config['PROFILE_TOKEN'] = None  # If set, the X-Profile / ?profile= value must equal it
+app.config['PROFILE_SAMPLE_RATE'] = 0  # Also profile 1 in N requests continuously (0 disables)
+app.config['PROFILE_DIR'] = os.path.join(os.path.dirname(__file__), '../profiles')  # Where profiles are written
 
 # Create upload folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Initialize NLP analyzer and meme generator
-nlp_analyzer = NLPAnalyzer()
-meme_generator = MemeGenerator()
+# Result cache for the NLP analyzer
+analysis_cache = None
+if app.config['ANALYSIS_CACHE_SIZE'] > 0:
+    analysis_cache = AnalysisCache(
+        max_entries=app.config['ANALYSIS_CACHE_SIZE'],
+        max_bytes=app.config['ANALYSIS_CACHE_MAX_BYTES'],
+        ttl=app.config['ANALYSIS_CACHE_TTL']
+    )
+
+# The NLP analyzer and meme generator are created on first use (or by
+# warm_up()), so importing this module stays fast
+_components_lock = threading.Lock()
+_nlp_analyzer = None
+_meme_generator = None
+
+def get_nlp_analyzer():
+    """
+    Get the NLP analyzer, creating it on first use.
+    
+    Returns:
+        NLPAnalyzer: The process-wide analyzer
+    """
+    global _nlp_analyzer
+    if _nlp_analyzer is None:
+        with _components_lock:
+            if _nlp_analyzer is None:
+                from nlp.analyzer import NLPAnalyzer
+                resources.configure(app.config['NLP_RESOURCE_BUNDLE'], app.config['NLP_ALLOW_DOWNLOAD'])
+                _nlp_analyzer = NLPAnalyzer(cache=analysis_cache)
+    return _nlp_analyzer
+
+def get_meme_generator():
+    """
+    Get the meme generator, creating it on first use.
+    
+    Returns:
+        MemeGenerator: The process-wide generator
+    """
+    global _meme_generator
+    if _meme_generator is None:
+        with _components_lock:
+            if _meme_generator is None:
+                if app.config['DETERMINISTIC_MEMES']:
+                    # Identical requests reuse the same rendered file in the upload folder
+                    generator = MemeGenerator(
+                        templates_dir=app.config['TEMPLATES_DIR'],
+                        deterministic=True,
+                        render_cache=RenderCache(app.config['UPLOAD_FOLDER'], max_bytes=app.config['RENDER_CACHE_MAX_BYTES']),
+                        encode_options=app.config['MEME_ENCODE_OPTIONS'],
+                        captions_path=app.config['CAPTIONS_PATH']
+                    )
+                else:
+                    generator = MemeGenerator(
+                        templates_dir=app.config['TEMPLATES_DIR'],
+                        encode_options=app.config['MEME_ENCODE_OPTIONS'],
+                        captions_path=app.config['CAPTIONS_PATH']
+                    )
+                
+                # Pick up added or edited templates without touching the disk per request
+                if app.config['TEMPLATE_WATCH_INTERVAL'] > 0:
+                    generator.template_index.watch(app.config['TEMPLATE_WATCH_INTERVAL'])
+                
+                _meme_generator = generator
+    return _meme_generator
+
+# Background writer for memes that are returned from memory and saved afterwards
+meme_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='meme-writer')
+
+def warm_up():
+    """Create the analyzer and generator now and load all their models, fonts and templates."""
+    nlp_analyzer = get_nlp_analyzer()
+    meme_generator = get_meme_generator()
+    nlp_analyzer.warm_up()
+    meme_generator.warm_font_cache()
+    meme_generator.warm_template_cache()
+    if app.config['CAPTION_SUGGESTIONS'] > 0:
+        # Accessing the index loads it
+        meme_generator.caption_index
+
+def preload():
+    """
+    Load all shared models and templates in the current process.
+    
+    The pre-fork launcher in app.py calls this in the master process, so
+    forked workers share the loaded lexicons, tokenizer, fonts and decoded
+    templates copy-on-write. Background threads do not survive a fork, so
+    the template watcher is stopped here and restarted by after_fork().
+    """
+    warm_up()
+    get_meme_generator().template_index.stop_watching()
+
+def after_fork():
+    """Restart per-process background threads in a forked worker."""
+    if app.config['TEMPLATE_WATCH_INTERVAL'] > 0:
+        get_meme_generator().template_index.watch(app.config['TEMPLATE_WATCH_INTERVAL'])
+
+@app.before_request
+def _start_stage_breakdown():
+    """Start collecting the stage breakdown of this request."""
+    stage_metrics.enabled = app.config['METRICS_ENABLED']
+    if stage_metrics.enabled and app.config['STAGE_TIMING_HEADER']:
+        g.stage_breakdown_token = stage_metrics.start_breakdown()
+
+@app.after_request
+def _add_stage_timing_header(response):
+    """Report the stage breakdown of this request in a Server-Timing header."""
+    token = g.pop('stage_breakdown_token', None)
+    if token is not None:
+        breakdown = stage_metrics.stop_breakdown(token)
+        if breakdown:
+            response.headers['Server-Timing'] = format_server_timing(breakdown)
+    return response
+
+# Profiles one request at a time on demand or for 1 in N requests
+request_profiler = RequestProfiler()
+
+def _profile_requested():
+    """Check whether the current request should be profiled."""
+    if app.config['PROFILING_ENABLED']:
+        flag = request.headers.get('X-Profile') or request.args.get('profile')
+        token = app.config['PROFILE_TOKEN']
+        if flag and (token is None or flag == token):
+            return True
+    return request_profiler.sample(app.config['PROFILE_SAMPLE_RATE'])
+
+@app.before_request
+def _start_profile():
+    """Start profiling this request if it was asked for or sampled."""
+    if _profile_requested():
+        g.profile = request_profiler.start()
+
+@app.after_request
+def _finish_profile(response):
+    """
+    Stop profiling this request and write the profile once the response is sent.
+    
+    The profile is saved under PROFILE_DIR as <name>.pstats and
+    <name>.collapsed, and <name> is returned in the X-Profile-Id header.
+    Streamed response bodies are produced after this point and are not
+    included.
+    """
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    
+    stats = request_profiler.stop(profile)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unknown'}-{uuid.uuid4().hex[:8]}"
+    output_dir = app.config['PROFILE_DIR']
+    response.call_on_close(lambda: write_profile(stats, output_dir, name))
+    response.headers['X-Profile-Id'] = name
+    return response
+
+@app.teardown_request
+def _abandon_profile(exc):
+    """Stop a profile left running by a request that failed before its response."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        request_profiler.stop(profile)
 
 @app.route('/')
 def index():
@@ -44,23 +230,113 @@ def analyze_text():
     text = data['text']
     
     # Analyze the text
-    analysis_result = nlp_analyzer.analyze(text)
+    analysis_result = get_nlp_analyzer().analyze(text)
     
     return jsonify(analysis_result)
 
-@app.route('/api/generate-meme', methods=['POST'])
-def generate_meme():
+def _get_batch_texts(max_size):
     """
-    API endpoint to generate a meme from input text.
+    Read and validate the texts of a batch request.
     
-    Returns JSON with the meme image URL and analysis results.
+    Args:
+        max_size (int): Maximum number of texts allowed
+        
+    Returns:
+        tuple: (texts, None) if valid, or (None, error response)
     """
     data = request.get_json()
     
-    if not data or 'text' not in data:
-        return jsonify({'error': 'No text provided'}), 400
+    texts = data.get('texts') if isinstance(data, dict) else data
     
-    text = data['text']
+    if not isinstance(texts, list) or not texts:
+        return None, (jsonify({'error': 'No texts provided'}), 400)
+    
+    if not all(isinstance(text, str) for text in texts):
+        return None, (jsonify({'error': 'All texts must be strings'}), 400)
+    
+    if len(texts) > max_size:
+        return None, (jsonify({'error': f"At most {max_size} texts per batch"}), 400)
+    
+    return texts, None
+
+@app.route('/api/analyze-batch', methods=['POST'])
+def analyze_batch():
+    """
+    API endpoint to analyze many texts in one request.
+    
+    Accepts a JSON array of strings, or an object with a 'texts' array.
+    Returns JSON with one analysis result per text, in input order.
+    """
+    texts, error = _get_batch_texts(app.config['MAX_BATCH_SIZE'])
+    if error:
+        return error
+    
+    # Analyze the texts together
+    results = get_nlp_analyzer().analyze_many(texts)
+    
+    return jsonify({'results': results})
+
+def _write_meme(output_path, image_bytes):
+    """Write encoded meme bytes to disk (runs on the background writer)."""
+    with open(output_path, 'wb') as f:
+        f.write(image_bytes)
+
+def _read_meme(meme_path):
+    """Read an encoded meme from disk."""
+    with open(meme_path, 'rb') as f:
+        return f.read()
+
+def _new_meme_filename():
+    """Get a unique file name for a meme in the configured output format."""
+    return f"meme_{uuid.uuid4().hex[:8]}{FORMAT_EXTENSIONS[get_meme_generator().encode_options['format']]}"
+
+def _meme_url(filename):
+    """Get the URL of a meme file in the upload folder."""
+    return url_for('serve_meme', filename=filename)
+
+def _meme_request_options(data):
+    """
+    Read and validate the body of a generate-meme request.
+    
+    Args:
+        data: The decoded JSON body
+        
+    Returns:
+        tuple: ((text, response_mode, thumbnail_size, persist), None) if valid,
+        or (None, error message)
+    """
+    if not isinstance(data, dict) or 'text' not in data:
+        return None, 'No text provided'
+    
+    response_mode = data.get('response', app.config['MEME_RESPONSE_MODE'])
+    
+    if response_mode not in ('url', 'base64', 'image'):
+        return None, "response must be 'url', 'base64' or 'image'"
+    
+    thumbnail_size = app.config['THUMBNAIL_SIZE'] if data.get('thumbnail') and response_mode != 'image' else None
+    
+    return (data['text'], response_mode, thumbnail_size, bool(data.get('persist'))), None
+
+def produce_meme(text, response_mode, thumbnail_size, persist, meme_url):
+    """
+    Analyze text and render its meme for a generate-meme request.
+    
+    This does all the CPU-bound work of the endpoint and needs no request
+    context, so the async server can run it on an executor.
+    
+    Args:
+        text (str): Input text
+        response_mode (str): 'url', 'base64' or 'image'
+        thumbnail_size (tuple): Max thumbnail size, or None for no thumbnail
+        persist (bool): Save in-memory renders to disk after responding
+        meme_url (callable): Maps a file name in the upload folder to its URL
+        
+    Returns:
+        dict: 'analysis', 'meme_url', 'thumbnail_url', 'caption_suggestions'
+        and 'outputs' (encoded meme bytes; None in 'url' mode)
+    """
+    nlp_analyzer = get_nlp_analyzer()
+    meme_generator = get_meme_generator()
     
     # Analyze the text
     analysis_result = nlp_analyzer.analyze(text)
@@ -68,18 +344,170 @@ def generate_meme():
     # Get meme parameters from analysis
     meme_params = nlp_analyzer.get_meme_parameters(analysis_result)
     
-    # Generate a meme
-    filename = f"meme_{uuid.uuid4().hex[:8]}.jpg"
-    output_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    meme_path = meme_generator.create_meme(meme_params, output_path)
+    # Curated captions matching the analysis
+    suggestions = []
+    if app.config['CAPTION_SUGGESTIONS'] > 0:
+        suggestions = meme_generator.suggest_captions(meme_params, app.config['CAPTION_SUGGESTIONS'])
     
-    # Create URL for the meme
-    meme_url = url_for('serve_meme', filename=os.path.basename(meme_path))
+    if response_mode == 'url' or meme_generator.render_cache is not None:
+        # Generate a meme on disk (content-addressed when the render cache is on,
+        # so repeated requests return the existing file)
+        output_path = None
+        if meme_generator.render_cache is None:
+            output_path = os.path.join(app.config['UPLOAD_FOLDER'], _new_meme_filename())
+        meme_path, thumbnail_path = meme_generator.create_meme_with_thumbnail(
+            meme_params, output_path, thumbnail_size=thumbnail_size
+        )
+        
+        result = {
+            'analysis': analysis_result,
+            'meme_url': meme_url(os.path.basename(meme_path)),
+            'thumbnail_url': meme_url(os.path.basename(thumbnail_path)) if thumbnail_path else None,
+            'caption_suggestions': suggestions,
+            'outputs': None
+        }
+        
+        if response_mode != 'url':
+            # Serve the stored files' bytes inline
+            result['outputs'] = {
+                'mime_type': FORMAT_MIME_TYPES[meme_generator.encode_options['format']],
+                'image': _read_meme(meme_path),
+                'thumbnail': _read_meme(thumbnail_path) if thumbnail_path else None
+            }
+        return result
     
-    return jsonify({
-        'meme_url': meme_url,
-        'analysis': analysis_result
-    })
+    # Render the meme in memory
+    outputs = meme_generator.render_meme_outputs(meme_params, thumbnail_size=thumbnail_size)
+    result = {
+        'analysis': analysis_result,
+        'meme_url': None,
+        'thumbnail_url': None,
+        'caption_suggestions': suggestions,
+        'outputs': outputs
+    }
+    
+    # Optionally save it after the response has been produced
+    if persist:
+        filename = _new_meme_filename()
+        meme_writer.submit(_write_meme, os.path.join(app.config['UPLOAD_FOLDER'], filename), outputs['image'])
+        result['meme_url'] = meme_url(filename)
+        if outputs['thumbnail'] is not None:
+            root, extension = os.path.splitext(filename)
+            thumbnail_filename = f"{root}_thumb{extension}"
+            meme_writer.submit(_write_meme, os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_filename), outputs['thumbnail'])
+            result['thumbnail_url'] = meme_url(thumbnail_filename)
+    
+    return result
+
+def meme_payload(result):
+    """
+    Build the JSON body of a 'url' or 'base64' generate-meme response.
+    
+    Args:
+        result (dict): The result of produce_meme
+        
+    Returns:
+        dict: JSON-serializable response body
+    """
+    payload = {'analysis': result['analysis']}
+    
+    outputs = result['outputs']
+    if outputs is not None:
+        data_url_prefix = f"data:{outputs['mime_type']};base64,"
+        payload['meme_data'] = data_url_prefix + base64.b64encode(outputs['image']).decode('ascii')
+        if outputs['thumbnail'] is not None:
+            payload['thumbnail_data'] = data_url_prefix + base64.b64encode(outputs['thumbnail']).decode('ascii')
+    
+    if result['meme_url']:
+        payload['meme_url'] = result['meme_url']
+    if result['thumbnail_url']:
+        payload['thumbnail_url'] = result['thumbnail_url']
+    if result['caption_suggestions']:
+        payload['caption_suggestions'] = result['caption_suggestions']
+    
+    return payload
+
+@app.route('/api/generate-meme', methods=['POST'])
+def generate_meme():
+    """
+    API endpoint to generate a meme from input text.
+    
+    The optional 'response' field selects the output:
+    - 'url' (default): the meme is saved and JSON with its URL is returned
+    - 'base64': JSON with the image inlined as a data URL
+    - 'image': the encoded image itself
+    With 'base64' or 'image', set 'persist' to also save the meme to disk
+    after responding; its URL is then returned as 'meme_url' (or the
+    X-Meme-Url header). With DETERMINISTIC_MEMES enabled, memes are always
+    stored in the render cache and their URL is always returned.
+    
+    Set 'thumbnail' to also get a THUMBNAIL_SIZE preview, rendered in the
+    same pass, as 'thumbnail_url' or 'thumbnail_data' (JSON responses only).
+    
+    Returns the meme and, for JSON responses, the analysis results.
+    """
+    options, error = _meme_request_options(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+    
+    result = produce_meme(*options, meme_url=_meme_url)
+    
+    if options[1] == 'image':
+        outputs = result['outputs']
+        response = send_file(io.BytesIO(outputs['image']), mimetype=outputs['mime_type'])
+        if result['meme_url']:
+            response.headers['X-Meme-Url'] = result['meme_url']
+        return response
+    
+    return jsonify(meme_payload(result))
+
+@app.route('/api/generate-memes', methods=['POST'])
+def generate_memes():
+    """
+    API endpoint to generate one meme per input text in a single request.
+    
+    Accepts a JSON array of strings, or an object with a 'texts' array.
+    Memes are rendered in parallel. By default, returns JSON with one
+    {'meme_url', 'analysis'} entry per text, in input order. With
+    ?stream=1, streams newline-delimited JSON objects that also carry the
+    text's 'index', in the order the memes finish.
+    """
+    texts, error = _get_batch_texts(app.config['MAX_MEME_BATCH_SIZE'])
+    if error:
+        return error
+    
+    nlp_analyzer = get_nlp_analyzer()
+    meme_generator = get_meme_generator()
+    
+    # Analyze the texts together
+    analysis_results = nlp_analyzer.analyze_many(texts)
+    params_list = [nlp_analyzer.get_meme_parameters(result) for result in analysis_results]
+    
+    # Content-addressed memes pick their own paths
+    if meme_generator.render_cache is not None:
+        output_paths = None
+    else:
+        output_paths = [
+            os.path.join(app.config['UPLOAD_FOLDER'], _new_meme_filename())
+            for _ in texts
+        ]
+    
+    def meme_entry(index, meme_path):
+        return {
+            'meme_url': _meme_url(os.path.basename(meme_path)),
+            'analysis': analysis_results[index]
+        }
+    
+    if request.args.get('stream'):
+        def stream():
+            for index, meme_path in meme_generator.iter_create_memes(params_list, output_paths):
+                yield json.dumps({'index': index, **meme_entry(index, meme_path)}) + '\n'
+        
+        return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+    
+    meme_paths = meme_generator.create_memes(params_list, output_paths)
+    
+    return jsonify({'results': [meme_entry(index, meme_path) for index, meme_path in enumerate(meme_paths)]})
 
 @app.route('/memes/<filename>')
 def serve_meme(filename):
@@ -93,10 +521,7 @@ def list_templates():
     
     Returns JSON with template names and URLs.
     """
-    templates_dir = meme_generator.templates_dir
-    template_files = [f for f in os.listdir(templates_dir) 
-                     if os.path.isfile(os.path.join(templates_dir, f)) 
-                     and f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))]
+    template_files = get_meme_generator().template_index.template_names()
     
     templates = []
     for template in template_files:
@@ -110,7 +535,31 @@ def list_templates():
 @app.route('/templates/<filename>')
 def serve_template(filename):
     """Serve meme template images."""
-    return send_from_directory(meme_generator.templates_dir, filename)
+    return send_from_directory(get_meme_generator().templates_dir, filename)
+
+@app.route('/metrics')
+def metrics():
+    """
+    Expose stage latency histograms and cache statistics for Prometheus.
+    
+    The meme generator's caches are only reported once it has been created,
+    so scraping never loads the templates.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    
+    caches = {}
+    if analysis_cache is not None:
+        caches['analysis'] = analysis_cache.stats()
+    
+    generator = _meme_generator
+    if generator is not None:
+        caches['template'] = generator.template_cache.stats()
+        if generator.render_cache is not None:
+            caches['render'] = generator.render_cache.stats()
+    
+    body = stage_metrics.render_prometheus() + render_cache_metrics(caches)
+    return Response(body, mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+MemeMind ASGI Module
+
+This module serves the MemeMind web API from an asyncio event loop. Connections,
+request bodies and file transfers are handled on the loop, while CPU-bound
+analysis and rendering run on an executor, so one process can hold many
+concurrent connections without a worker per request.
+
+/api/analyze, /api/generate-meme, /api/templates and /memes/<filename> are
+served natively. Every other route is passed to the Flask app in web.app,
+which runs on the executor. Run with any ASGI server, e.g.:
+    uvicorn web.asgi:application
+"""
+
+import asyncio
+import contextvars
+import json
+import mimetypes
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from io import BytesIO
+from werkzeug.security import safe_join
+
+from metrics import stage_metrics, format_server_timing
+
+from .app import (
+    app as flask_app, get_nlp_analyzer, get_meme_generator, produce_meme, meme_payload,
+    _meme_request_options
+)
+
+flask_app.config.setdefault('ASGI_EXECUTOR_WORKERS', min(32, (os.cpu_count() or 1) + 4))
+flask_app.config.setdefault('ASGI_FILE_CHUNK_SIZE', 64 * 1024)
+
+# Runs analysis, rendering, file reads and the Flask fallback off the event loop
+executor = ThreadPoolExecutor(
+    max_workers=flask_app.config['ASGI_EXECUTOR_WORKERS'],
+    thread_name_prefix='asgi-worker'
+)
+
+class _RequestTooLarge(Exception):
+    """Raised when a request body exceeds MAX_CONTENT_LENGTH."""
+
+async def _run(func, *args):
+    """Run a blocking call on the executor."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+async def _read_body(receive):
+    """
+    Read the whole request body.
+
+    Raises:
+        _RequestTooLarge: If the body exceeds MAX_CONTENT_LENGTH
+    """
+    max_length = flask_app.config['MAX_CONTENT_LENGTH']
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if max_length is not None and size > max_length:
+            raise _RequestTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+def _decode_json(body):
+    """Decode a JSON request body, returning None if it is not valid JSON."""
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+async def _send_bytes(send, status, body, content_type, headers=()):
+    """Send a complete response."""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            *headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _send_json(send, obj, status=200, headers=()):
+    """Send a JSON response, serialized like Flask's jsonify."""
+    body = (flask_app.json.dumps(obj) + '\n').encode('utf-8')
+    await _send_bytes(send, status, body, 'application/json', headers)
+
+async def _run_timed(func, *args):
+    """
+    Run a blocking call on the executor, collecting its stage breakdown.
+
+    Returns:
+        tuple: (result, response headers carrying the breakdown as Server-Timing)
+    """
+    if not (stage_metrics.enabled and flask_app.config['STAGE_TIMING_HEADER']):
+        return await _run(func, *args), []
+
+    result, breakdown = await _run(stage_metrics.collect, func, *args)
+    if not breakdown:
+        return result, []
+    return result, [(b'server-timing', format_server_timing(breakdown).encode('latin-1'))]
+
+def _url_builder(scope):
+    """Get a meme file name -> URL function for the request's mount point."""
+    adapter = flask_app.url_map.bind('', script_name=scope.get('root_path') or '/')
+    return lambda filename: adapter.build('serve_meme', {'filename': filename})
+
+async def analyze_text(scope, receive, send):
+    """Async /api/analyze: analysis runs on the executor."""
+    data = _decode_json(await _read_body(receive))
+
+    if not isinstance(data, dict) or 'text' not in data:
+        await _send_json(send, {'error': 'No text provided'}, 400)
+        return
+
+    analysis_result, headers = await _run_timed(lambda: get_nlp_analyzer().analyze(data['text']))
+    await _send_json(send, analysis_result, headers=headers)
+
+async def generate_meme(scope, receive, send):
+    """Async /api/generate-meme: analysis, rendering and encoding run on the executor."""
+    options, error = _meme_request_options(_decode_json(await _read_body(receive)))
+    if error:
+        await _send_json(send, {'error': error}, 400)
+        return
+
+    text, response_mode, thumbnail_size, persist = options
+    result, headers = await _run_timed(produce_meme, text, response_mode, thumbnail_size, persist, _url_builder(scope))
+
+    if response_mode == 'image':
+        outputs = result['outputs']
+        if result['meme_url']:
+            headers.append((b'x-meme-url', result['meme_url'].encode('latin-1')))
+        await _send_bytes(send, 200, outputs['image'], outputs['mime_type'], headers)
+        return
+
+    # Base64 payloads can be large; encode them off the loop too
+    await _send_json(send, await _run(meme_payload, result), headers=headers)
+
+async def list_templates(scope, receive, send):
+    """Async /api/templates: answered from the in-memory template index."""
+    # The first call builds the generator (fonts, index), so it runs on the executor
+    generator = await _run(get_meme_generator)
+    root_path = (scope.get('root_path') or '').rstrip('/')
+    templates = [
+        {'name': template, 'url': f"{root_path}/templates/{template}"}
+        for template in generator.template_index.template_names()
+    ]
+    await _send_json(send, {'templates': templates})
+
+async def serve_meme(scope, receive, send, filename):
+    """Async /memes/<filename>: the file is streamed in chunks read on the executor."""
+    path = safe_join(flask_app.config['UPLOAD_FOLDER'], filename)
+    try:
+        f = await _run(open, path, 'rb') if path else None
+    except OSError:
+        f = None
+
+    if f is None:
+        await _send_json(send, {'error': 'Not found'}, 404)
+        return
+
+    try:
+        stat = os.fstat(f.fileno())
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', content_type.encode('latin-1')),
+                (b'content-length', str(stat.st_size).encode('latin-1')),
+                (b'last-modified', formatdate(stat.st_mtime, usegmt=True).encode('latin-1'))
+            ]
+        })
+
+        chunk_size = flask_app.config['ASGI_FILE_CHUNK_SIZE']
+        while True:
+            chunk = await _run(f.read, chunk_size)
+            more_body = len(chunk) == chunk_size
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+            if not more_body:
+                break
+    finally:
+        await _run(f.close)
+
+def _wsgi_environ(scope, body):
+    """Build a WSGI environ for an ASGI HTTP request."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    return environ
+
+async def _call_flask(scope, receive, send):
+    """Serve a request with the Flask app on the executor, streaming its response."""
+    environ = _wsgi_environ(scope, await _read_body(receive))
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    # Every step runs in one context: Flask's streamed responses keep their
+    # app and request contexts in context variables between chunks
+    context = contextvars.copy_context()
+    iterable = await _run(context.run, flask_app.wsgi_app, environ, start_response)
+    try:
+        iterator = iter(iterable)
+        chunk = await _run(context.run, next, iterator, None)
+        await send({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+
+        # Pull each chunk on the executor so streamed responses don't block the loop
+        while chunk is not None:
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            chunk = await _run(context.run, next, iterator, None)
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(iterable, 'close'):
+            await _run(context.run, iterable.close)
+
+# (method, path) -> native async handler
+ROUTES = {
+    ('POST', '/api/analyze'): analyze_text,
+    ('POST', '/api/generate-meme'): generate_meme,
+    ('GET', '/api/templates'): list_templates
+}
+
+async def _lifespan(receive, send):
+    """Handle ASGI startup and shutdown events."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """
+    ASGI entry point for the MemeMind web API.
+
+    Args:
+        scope (dict): ASGI connection scope
+        receive (callable): Awaitable returning the next ASGI event
+        send (callable): Awaitable sending an ASGI event
+    """
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    stage_metrics.enabled = flask_app.config['METRICS_ENABLED']
+    try:
+        handler = ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            await handler(scope, receive, send)
+        elif scope['method'] == 'GET' and scope['path'].startswith('/memes/'):
+            await serve_meme(scope, receive, send, scope['path'][len('/memes/'):])
+        else:
+            await _call_flask(scope, receive, send)
+    except _RequestTooLarge:
+        await _send_json(send, {'error': 'Request body too large'}, 413)